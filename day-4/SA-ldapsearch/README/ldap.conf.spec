@@ -38,10 +38,18 @@ basedn = <string>
 
 server = <comma-separated strings>
     * A comma-separated list of distributed LDAP server replica host names or IP addresses.
-    * When you specify more than one host, the add-on randomly picks a host and services requests in a round-robin
-    * fashion with the other servers.
+    * When you specify more than one host, the add-on checks each host for availability, in the order given by
+    * server_strategy, and connects to the first available host. Each host is checked at most once per connection.
+    * Hosts that failed to connect within the last 300 seconds are checked after all other hosts.
     * You must specify a value.
 
+server_strategy = first|round_robin
+    * Controls the order in which the add-on checks the hosts listed by the server setting.
+    * Set to first to check hosts in order of their most recent connect latency.
+    * Set to round_robin to check hosts in the order listed, starting each new connection one host after the host that
+    * the previous connection started with. The starting host is saved between searches.
+    * Defaults to first.
+
 ssl = <bool>
     * Controls whether or not the add-on uses SSL for its network operations.
     * Set to true to enable SSL. Otherwise, set to false.
@@ -72,3 +80,28 @@ paged_size = <int>
     * The maximum number of entries to return in a single page of LDAP search results.
     * Defaults to 1000, the default maximum page size permitted by Active Directory. See LDAP policies at
     * http://technet.microsoft.com/en-us/library/cc770976.aspx.
+
+schema_cache = <bool>
+    * Controls whether or not the add-on caches the directory schema of each server on disk between searches.
+    * When enabled, the schema is downloaded once and revalidated on each connection by reading the modifyTimestamp
+    * of the subschema subentry. Cached schemas are stored under $SPLUNK_HOME/var/run/splunk/SA-ldapsearch/schema.
+    * Defaults to true.
+
+cache_ttl = <int>
+    * The number of seconds that the ldapfetch, ldapfilter, and ldapgroup commands cache the entries they retrieve.
+    * Cached entries are shared by all searches on the search head and are stored in
+    * $SPLUNK_HOME/var/run/splunk/SA-ldapsearch/entries.db. Set to 0 to disable the cache.
+    * Defaults to 0.
+
+pipeline = <int>
+    * The maximum number of searches the ldapfetch and ldapfilter commands keep outstanding on a connection.
+    * Pipelining searches hides the round trip time to distant domain controllers. Records are still written in the
+    * order they are received. Set to 0 to send one search at a time. The maximum value is 100.
+    * Defaults to 0.
+
+concurrency = <int>
+    * The maximum number of searches the ldapfetch and ldapfilter commands run at once against each domain.
+    * Records for different domains are processed concurrently on worker threads, each with a connection of its own.
+    * Records are still written in the order they are received. Set to 0 to process records one at a time. The
+    * maximum value is 16.
+    * Defaults to 0.
@@ -7,14 +7,13 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import default
 import app
 import ldap3
-from base64 import b64encode
-import datetime
-from app.six import binary_type
+from app.six import iteritems, itervalues
+from collections import OrderedDict
 
 from splunklib.searchcommands import dispatch, StreamingCommand, Configuration, Option, validators
 
 
-@Configuration()
+@Configuration(distributed=False)
 class LdapFetchCommand(StreamingCommand):
     """  Filters and augments events with information from Active Directory.
 
@@ -33,6 +32,32 @@ class LdapFetchCommand(StreamingCommand):
         ''',
         default=[ldap3.ALL_ATTRIBUTES], validate=validators.List())
 
+    batchsize = Option(
+        doc=''' Specifies the maximum number of distinct distinguished names to fetch with a single search.
+        When greater than zero, records are read in windows of at most batchsize records and the distinguished names
+        they reference are fetched with one `(|(distinguishedName=...)...)` search per domain below `basedn`.
+        Distinguished names that are not found by this search are fetched one at a time. Records are written in the
+        order they were received.
+        **Default:** 0, specifying that each distinguished name should be fetched with its own search.
+        ''',
+        default=0, validate=validators.Integer(minimum=0, maximum=1000))
+
+    cache_ttl = Option(
+        doc=''' Specifies the number of seconds that fetched entries are cached and shared with other searches.
+        A value of 0 disables the cache.
+        **Default:** The value of cache_ttl as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0))
+
+    concurrency = Option(
+        doc=''' Specifies the maximum number of searches to run at once against each domain.
+        When greater than zero, records are processed on worker threads so that records for different domains are
+        fetched concurrently, each on a connection of its own. Records are written in the order they were received.
+        This setting is ignored when batchsize or pipeline is greater than zero.
+        **Default:** The value of concurrency as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0, maximum=16))
+
     debug = Option(
         doc=''' True, if the logging_level should be set to DEBUG; otherwise False.
         **Default:** The current value of logging_level.
@@ -55,6 +80,15 @@ class LdapFetchCommand(StreamingCommand):
         ''',
         default='default')
 
+    pipeline = Option(
+        doc=''' Specifies the maximum number of searches to keep outstanding on the connection to each domain.
+        When greater than zero, distinguished names are fetched on an asynchronous connection without waiting for the
+        response to one search before sending the next. Records are written in the order they were received. This
+        setting is ignored when batchsize is greater than zero.
+        **Default:** The value of pipeline as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0, maximum=100))
+
     # endregion
 
     # region Command implementation
@@ -65,67 +99,364 @@ class LdapFetchCommand(StreamingCommand):
         :return: `None`.
 
         """
-        configuration = app.Configuration(self, is_expanded=True)
+        if self.connection_pool is None:  # we're processing the first chunk of records
+            configuration = app.Configuration(self, is_expanded=True)
+            self.connection_pool = configuration.open_connection_pool(self.attrs)
+
+        configuration = self.connection_pool.configuration
         expanded_domain = app.ExpandedString(self.domain)
-        search_scope = ldap3.BASE
-        search_filter = '(objectClass=*)'
 
         try:
-            with configuration.open_connection_pool(self.attrs) as connection_pool:
-                attribute_names = connection_pool.attributes
-                for record in records:
-                    dn = record.get(self.dn)
-                    if not dn:  # got a falsey value
-                        self.logger.warning('Received empty value for the dn, adding the event without the attributes')
-                        self._augment_record(record, dn, None, attribute_names)
+            with self.connection_pool as connection_pool:
+                if self.batchsize > 0:
+                    for record in self._stream_batches(records, connection_pool, expanded_domain):
                         yield record
-                        continue
-                    domain = expanded_domain.get_value(record)
-                    if domain is None:
-                        self.logger.warning('Received empty value for the domain, adding the event without the attributes')
-                        self._augment_record(record, dn, None, attribute_names)
-                        yield record
-                        continue
-                    connection = connection_pool.select(domain)
-                    if not connection:
-                        self.logger.warning('dn="%s": domain="%s" is not configured', self.dn, domain)
-                        self._augment_record(record, dn, None, attribute_names)
+                    return
+                if self.pipeline > 0:
+                    for record in self._stream_pipelined(records, connection_pool, expanded_domain):
                         yield record
-                        continue
-                    for search_base in dn if isinstance(dn, list) else (dn,):
-                        if search_base:
-                            try:
-                                connection.search(search_base, search_filter, search_scope, attributes=attribute_names)
-                            except ldap3.core.exceptions.LDAPNoSuchObjectResult:
-                                self.logger.warning(
-                                    'dn="%s" domain="%s": distinguishedName="%s" does not exist', self.dn, domain,
-                                    search_base)
-                                self._augment_record(record, dn, None, attribute_names)
-                            else:
-                                response = connection.response[0]
-                                attributes = app.get_attributes(self, connection.response[0])
-                                if attributes:
-                                    self._augment_record(record, response['dn'], attributes, attribute_names)
-                        else:
-                            self.logger.warning('Received empty value for the search_base, adding the event without the attributes')
-                            self._augment_record(record, dn, None, attribute_names)
+                    return
+                if self.concurrency > 0:
+                    for record in self._stream_concurrently(records, connection_pool, expanded_domain):
                         yield record
-                    pass
+                    return
+                for record in records:
+                    dn = record.get(self.dn)
+                    domain = expanded_domain.get_value(record) if dn else None
+                    connection = None if domain is None else connection_pool.select(domain)
+                    for augmented_record in self._fetch_record(connection_pool, connection, record, dn, domain):
+                        yield augmented_record
 
         except ldap3.core.exceptions.LDAPException as error:
             self.error_exit(error, app.get_ldap_error_message(error, configuration))
 
         return
 
-    def _augment_record(self, record, dn, attributes, attribute_names):
+    def __init__(self):
+        super(LdapFetchCommand, self).__init__()
+        self.connection_pool = None
+        return
+
+    def _fetch_record(self, connection_pool, connection, record, dn, domain):
+        """ Fetches the distinguished names referenced by a record one at a time.
+
+        :param connection_pool: The open connection pool from which :paramref:`connection` was selected.
+        :param connection: A connection to the directory service for :paramref:`domain` or :const:`None`, if
+            :paramref:`domain` is not configured.
+        :param record: An event from the command pipeline.
+        :param dn: The value of the :code:`dn` field of :paramref:`record`.
+        :param domain: The expanded domain name for :paramref:`record`.
+        :return: An iterable stream of :paramref:`record`, augmented once for each distinguished name in
+            :paramref:`dn`.
+
+        """
+        attribute_names = connection_pool.attributes
+
+        if not dn:  # got a falsey value
+            self.logger.warning('Received empty value for the dn, adding the event without the attributes')
+            self._augment_record(record, dn, None, attribute_names)
+            yield record
+            return
+        if domain is None:
+            self.logger.warning('Received empty value for the domain, adding the event without the attributes')
+            self._augment_record(record, dn, None, attribute_names)
+            yield record
+            return
+        if not connection:
+            self.logger.warning('dn="%s": domain="%s" is not configured', self.dn, domain)
+            self._augment_record(record, dn, None, attribute_names)
+            yield record
+            return
+        for search_base in dn if isinstance(dn, list) else (dn,):
+            if search_base:
+                entry = self._fetch_entry(connection_pool, connection, domain, search_base)
+                if entry is None:
+                    self.logger.warning(
+                        'dn="%s" domain="%s": distinguishedName="%s" does not exist', self.dn, domain, search_base)
+                    self._augment_record(record, dn, None, attribute_names)
+                elif entry[1]:
+                    self._augment_record(record, entry[0], entry[1], attribute_names, connection)
+            else:
+                self.logger.warning(
+                    'Received empty value for the search_base, adding the event without the attributes')
+                self._augment_record(record, dn, None, attribute_names)
+            yield record
+
+        return
+
+    def _stream_concurrently(self, records, connection_pool, expanded_domain):
+        """ Fetches the distinguished names referenced by records for different domains concurrently.
+
+        :param records: An iterable stream of events from the command pipeline.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :param expanded_domain: Expands the domain name for each record.
+        :return: An iterable stream of augmented records in the order they were received.
+
+        """
+        def get_requests():
+            for record in records:
+                dn = record.get(self.dn)
+                domain = expanded_domain.get_value(record) if dn else None
+                yield domain, (record, dn, domain)
+            return
+
+        def fetch_record(connection, request):
+            # Records are copied because a record is augmented once for each distinguished name it references
+            record, dn, domain = request
+            return [augmented_record.copy() for augmented_record in self._fetch_record(
+                connection_pool, connection, record, dn, domain)]
+
+        for augmented_records in connection_pool.fan_out(fetch_record, get_requests(), self.concurrency):
+            for record in augmented_records:
+                yield record
+
+        return
+
+    def _stream_batches(self, records, connection_pool, expanded_domain):
+        """ Fetches the distinguished names referenced by windows of records with one search per domain and window.
+
+        :param records: An iterable stream of events from the command pipeline.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :param expanded_domain: Expands the domain name for each record.
+        :return: An iterable stream of augmented records in the order they were received.
+
+        """
+        batch = []
+        names = set()
+
+        for record in records:
+            dn = record.get(self.dn)
+            domain = expanded_domain.get_value(record) if dn else None
+            batch.append((record, dn, domain))
+            if domain is not None:
+                names.update((domain, search_base) for search_base in (dn if isinstance(dn, list) else (dn,)))
+            if len(names) >= self.batchsize or len(batch) >= self.batchsize:
+                # Records without names to fetch count as well, so that no more than batchsize records are held
+                for augmented_record in self._write_batch(batch, connection_pool):
+                    yield augmented_record
+                batch = []
+                names.clear()
+
+        for augmented_record in self._write_batch(batch, connection_pool):
+            yield augmented_record
+
+        return
+
+    def _stream_pipelined(self, records, connection_pool, expanded_domain):
+        """ Fetches the distinguished names referenced by records with searches pipelined by an app.SearchPipeline.
+
+        :param records: An iterable stream of events from the command pipeline.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :param expanded_domain: Expands the domain name for each record.
+        :return: An iterable stream of augmented records in the order they were received.
+
+        """
+        attribute_names = connection_pool.attributes
+        entry_cache = connection_pool.entry_cache
+        search_pipeline = app.SearchPipeline(self.pipeline)
+
+        def get_requests():
+            for record in records:
+                dn = record.get(self.dn)
+                if not dn:  # got a falsey value
+                    self.logger.warning('Received empty value for the dn, adding the event without the attributes')
+                    yield (record, dn, None, None, None, None), None, None
+                    continue
+                domain = expanded_domain.get_value(record)
+                if domain is None:
+                    self.logger.warning('Received empty value for the domain, adding the event without the attributes')
+                    yield (record, dn, domain, None, None, None), None, None
+                    continue
+                connection = connection_pool.select_pipelined(domain)
+                if not connection:
+                    self.logger.warning('dn="%s": domain="%s" is not configured', self.dn, domain)
+                    yield (record, dn, domain, None, None, None), None, None
+                    continue
+                for search_base in dn if isinstance(dn, list) else (dn,):
+                    if not search_base:
+                        self.logger.warning(
+                            'Received empty value for the search_base, adding the event without the attributes')
+                        yield (record, dn, domain, search_base, None, None), None, None
+                        continue
+                    if entry_cache is not None:
+                        entry = entry_cache.get('ldapfetch', domain, search_base.lower(), attribute_names, self.decode)
+                        if entry is not None:
+                            yield (record, dn, domain, search_base, entry, connection), None, None
+                            continue
+                    yield (record, dn, domain, search_base, None, connection), connection, dict(
+                        search_base=search_base, search_filter='(objectClass=*)', search_scope=ldap3.BASE,
+                        attributes=attribute_names)
+            return
+
+        for (record, dn, domain, search_base, entry, connection), response in search_pipeline.search(get_requests()):
+            if response is not None:
+                if response:
+                    entry = response[0]['dn'], app.get_attributes(self, response[0])
+                    if entry_cache is not None and entry[1]:
+                        entry_cache.set(entry, 'ldapfetch', domain, search_base.lower(), attribute_names, self.decode)
+                else:
+                    self.logger.warning(
+                        'dn="%s" domain="%s": distinguishedName="%s" does not exist', self.dn, domain, search_base)
+            if entry is None:
+                self._augment_record(record, dn, None, attribute_names)
+            elif entry[1]:
+                self._augment_record(record, entry[0], entry[1], attribute_names, connection)
+            yield record
+
+        return
+
+    def _write_batch(self, batch, connection_pool):
+        """
+        :param batch: A list of `(record, dn, domain)` tuples.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :return: An iterable stream of augmented records in the order they were received.
+
+        """
+        attribute_names = connection_pool.attributes
+        entries = self._fetch_entries(batch, connection_pool)
+
+        for record, dn, domain in batch:
+            if not dn:  # got a falsey value
+                self.logger.warning('Received empty value for the dn, adding the event without the attributes')
+                self._augment_record(record, dn, None, attribute_names)
+                yield record
+                continue
+            if domain is None:
+                self.logger.warning('Received empty value for the domain, adding the event without the attributes')
+                self._augment_record(record, dn, None, attribute_names)
+                yield record
+                continue
+            connection = connection_pool.select(domain)
+            if not connection:
+                self.logger.warning('dn="%s": domain="%s" is not configured', self.dn, domain)
+                self._augment_record(record, dn, None, attribute_names)
+                yield record
+                continue
+            for search_base in dn if isinstance(dn, list) else (dn,):
+                if search_base:
+                    entry = entries.get((domain, search_base.lower()))
+                    if entry is None:
+                        self.logger.warning(
+                            'dn="%s" domain="%s": distinguishedName="%s" does not exist', self.dn, domain, search_base)
+                        self._augment_record(record, dn, None, attribute_names)
+                    elif entry[1]:
+                        self._augment_record(record, entry[0], entry[1], attribute_names, connection)
+                else:
+                    self.logger.warning('Received empty value for the search_base, adding the event without the attributes')
+                    self._augment_record(record, dn, None, attribute_names)
+                yield record
+
+        return
+
+    def _fetch_entries(self, batch, connection_pool):
+        """
+        :param batch: A list of `(record, dn, domain)` tuples.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :return: A dictionary mapping `(domain, distinguished name in lower case)` to `(dn, attributes)` tuples.
+
+        """
+        attribute_names = connection_pool.attributes
+        paged_size = connection_pool.configuration.paged_size
+        search_bases = OrderedDict()
+
+        for record, dn, domain in batch:
+            if dn and domain is not None:
+                names = search_bases.setdefault(domain, OrderedDict())
+                for search_base in dn if isinstance(dn, list) else (dn,):
+                    if search_base:
+                        names[search_base.lower()] = search_base
+
+        entry_cache = connection_pool.entry_cache
+        entries = {}
+
+        for domain, names in iteritems(search_bases):
+
+            connection = connection_pool.select(domain)
+
+            if not connection:
+                continue
+
+            if entry_cache is not None:
+                for key, search_base in list(iteritems(names)):
+                    entry = entry_cache.get('ldapfetch', domain, key, attribute_names, self.decode)
+                    if entry is not None:
+                        entries[(domain, key)] = entry
+                        del names[key]
+
+            names = list(itervalues(names))
+
+            for start in range(0, len(names), self.batchsize):
+                search_filter = '(|{0})'.format(''.join(
+                    '(distinguishedName={0})'.format(name)
+                    for name in app.escape_assertion_values(names[start:start + self.batchsize])))
+                entry_generator = connection.extend.standard.paged_search(
+                    search_base=connection_pool.basedns[domain], search_filter=search_filter,
+                    search_scope=ldap3.SUBTREE, attributes=attribute_names, paged_size=paged_size)
+                for entry in entry_generator:
+                    attributes = app.get_attributes(self, entry)
+                    if attributes:
+                        key = entry['dn'].lower()
+                        entries[(domain, key)] = entry = entry['dn'], attributes
+                        if entry_cache is not None:
+                            entry_cache.set(entry, 'ldapfetch', domain, key, attribute_names, self.decode)
+
+            # Fall back to a base search for names outside of basedn or whose spelling differs from the directory's
+
+            for search_base in names:
+                key = search_base.lower()
+                if (domain, key) not in entries:
+                    entry = self._fetch_entry(connection_pool, connection, domain, search_base)
+                    if entry is not None:
+                        entries[(domain, key)] = entry
+
+        return entries
+
+    def _fetch_entry(self, connection_pool, connection, domain, search_base):
+        """
+        :param connection_pool: The open connection pool from which :paramref:`connection` was selected.
+        :param connection: A connection to the directory service for :paramref:`domain`.
+        :param domain: The domain to search.
+        :param search_base: The distinguished name of the entry to fetch.
+        :return: A `(dn, attributes)` tuple or :const:`None`, if there is no entry named :paramref:`search_base`.
+
+        """
+        attribute_names = connection_pool.attributes
+        entry_cache = connection_pool.entry_cache
+        key = search_base.lower()
+
+        if entry_cache is not None:
+            entry = entry_cache.get('ldapfetch', domain, key, attribute_names, self.decode)
+            if entry is not None:
+                return entry
+
+        try:
+            connection.search(search_base, '(objectClass=*)', ldap3.BASE, attributes=attribute_names)
+        except ldap3.core.exceptions.LDAPNoSuchObjectResult:
+            return None
+
+        response = connection.response[0]
+        entry = response['dn'], app.get_attributes(self, response)
+
+        if entry_cache is not None and entry[1]:
+            entry_cache.set(entry, 'ldapfetch', domain, key, attribute_names, self.decode)
+
+        return entry
+
+    def _augment_record(self, record, dn, attributes, attribute_names, connection=None):
         """
         :param record:
         :param dn:
         :param attributes:
+        :param attribute_names:
+        :param connection: The connection from which :paramref:`attributes` were read or :const:`None`, if there are
+            no attributes. Values are normalized according to the schema of its server.
         :return:
 
         """
         record[self.dn] = dn
+        schema = None if connection is None else connection.server.schema
+        normalize_value = app.get_attribute_normalizer(schema).normalize_value
+
         for name in attribute_names:
 
             value = None
@@ -133,18 +464,7 @@ class LdapFetchCommand(StreamingCommand):
             if attributes:
                 value = attributes.get(name)
 
-            if isinstance(value, binary_type):
-                value = b64encode(value).decode('utf-8')
-            elif isinstance(value, datetime.datetime):
-            	value = str(value)
-            elif isinstance(value, list):
-                for i in range(len(value)):
-                    if isinstance(value[i], binary_type):
-                        value[i] = b64encode(value[i]).decode('utf-8')
-                    elif isinstance(value[i], datetime.datetime):
-                        value[i] = str(value[i])
-
-            record[name] = value
+            record[name] = normalize_value(name, value)
 
         return
 
@@ -7,14 +7,11 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import default
 import app
 import ldap3
-from base64 import b64encode
-import datetime
-from app.six import binary_type
 
 from splunklib.searchcommands import dispatch, StreamingCommand, Configuration, Option, validators
 
 
-@Configuration()
+@Configuration(distributed=False)
 class LdapFilterCommand(StreamingCommand):
     """  Filters and augments events with information from Active Directory.
 
@@ -70,6 +67,30 @@ class LdapFilterCommand(StreamingCommand):
         ''',
         default=0, validate=validators.Integer(minimum=0))
 
+    cache_ttl = Option(
+        doc=''' Specifies the number of seconds that search results are cached and shared with other searches.
+        A value of 0 disables the cache.
+        **Default:** The value of cache_ttl as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0))
+
+    pipeline = Option(
+        doc=''' Specifies the maximum number of searches to keep outstanding on the connection to each domain.
+        When greater than zero, searches are sent on an asynchronous connection without waiting for the results of one
+        search before sending the next. Records are written in the order they were received.
+        **Default:** The value of pipeline as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0, maximum=100))
+
+    concurrency = Option(
+        doc=''' Specifies the maximum number of searches to run at once against each domain.
+        When greater than zero, records are processed on worker threads so that searches for different domains run
+        concurrently, each on a connection of its own. Records are written in the order they were received. This
+        setting is ignored when pipeline is greater than zero.
+        **Default:** The value of concurrency as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0, maximum=16))
+
     debug = Option(
         doc=''' True, if the logging_level should be set to DEBUG; otherwise False.
         **Default:** The current value of logging_level.
@@ -86,13 +107,32 @@ class LdapFilterCommand(StreamingCommand):
         :return: `None`.
 
         """
-        option_basedn = self.basedn
-        configuration = app.Configuration(self, is_expanded=True)
+        if self.connection_pool is None:  # we're processing the first chunk of records
+            self.option_basedn = self.basedn  # configuration.select overwrites self.basedn, if the option is not set
+            configuration = app.Configuration(self, is_expanded=True)
+            self.connection_pool = configuration.open_connection_pool(self.attrs)
+
+        option_basedn = self.option_basedn
+        configuration = self.connection_pool.configuration
         expanded_domain = app.ExpandedString(self.domain)
         expanded_search_filter = app.ExpandedString(self.search, converter=app.escape_assertion_value)
 
         try:
-            with configuration.open_connection_pool(self.attrs) as connection_pool:
+            with self.connection_pool as connection_pool:
+
+                if self.pipeline > 0:
+                    entry_generator = self._stream_pipelined(
+                        records, connection_pool, expanded_domain, expanded_search_filter, option_basedn)
+                    for record in entry_generator:
+                        yield record
+                    return
+
+                if self.concurrency > 0:
+                    entry_generator = self._stream_concurrently(
+                        records, connection_pool, expanded_domain, expanded_search_filter, option_basedn)
+                    for record in entry_generator:
+                        yield record
+                    return
 
                 for record in records:
 
@@ -108,40 +148,11 @@ class LdapFilterCommand(StreamingCommand):
 
                     connection = connection_pool.select(domain)
 
-                    if not connection:
-                        self.logger.warning('search="%s": domain="%s" is not configured', search_filter, domain)
-                        continue
+                    entry_generator = self._join_record(
+                        connection_pool, connection, record, domain, search_filter, option_basedn)
 
-                    if not option_basedn:
-                        self.basedn = configuration.basedn
-
-                    search_base = app.ExpandedString(self.basedn).get_value(record)  # must be instantiated here
-
-                    entry_generator = connection.extend.standard.paged_search(
-                        search_base=search_base, search_filter=search_filter, search_scope=self.scope,
-                        attributes=connection_pool.attributes, paged_size=configuration.paged_size)
-
-                    for entry in entry_generator:
-                        attributes = app.get_attributes(self, entry)
-                        if not attributes:
-                            continue
-                        for name in connection_pool.attributes:
-                            value = attributes.get(name, '')
-            
-                            if isinstance(value, binary_type):
-                                value = b64encode(value).decode('utf-8')
-                            elif isinstance(value, datetime.datetime):
-                                value = str(value)
-                            elif isinstance(value, list):
-                                for i in range(len(value)):
-                                    if isinstance(value[i], binary_type):
-                                        value[i] = b64encode(value[i]).decode('utf-8')
-                                    elif isinstance(value[i], datetime.datetime):
-                                        value[i] = str(value[i])
-
-                            record[name] = value
-
-                        yield record.copy()
+                    for joined_record in entry_generator:
+                        yield joined_record
 
                     pass
 
@@ -150,6 +161,176 @@ class LdapFilterCommand(StreamingCommand):
 
         return
 
+    def _join_record(self, connection_pool, connection, record, domain, search_filter, option_basedn):
+        """
+        :param connection_pool: The open connection pool from which :paramref:`connection` was selected.
+        :param connection: A connection to the directory service for :paramref:`domain` or :const:`None`, if
+            :paramref:`domain` is not configured.
+        :param record: An event from the command pipeline.
+        :param domain: The expanded domain name for :paramref:`record`.
+        :param search_filter: The expanded search filter for :paramref:`record`.
+        :param option_basedn: The value of the basedn option or :const:`None`, if the option is not set.
+        :return: An iterable stream of copies of :paramref:`record`, one joined with each matching entry.
+
+        """
+        if not connection:
+            self.logger.warning('search="%s": domain="%s" is not configured', search_filter, domain)
+            return
+
+        basedn = option_basedn if option_basedn else connection_pool.basedns[domain]
+        search_base = app.ExpandedString(basedn).get_value(record)  # must be instantiated here
+
+        for attributes in self._search_entries(connection_pool, connection, domain, search_base, search_filter):
+            self._augment_record(record, attributes, connection_pool.attributes, connection)
+            yield record.copy()
+
+        return
+
+    def _stream_concurrently(self, records, connection_pool, expanded_domain, expanded_search_filter, option_basedn):
+        """ Joins records with the results of searches run concurrently for different domains.
+
+        :param records: An iterable stream of events from the command pipeline.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :param expanded_domain: Expands the domain name for each record.
+        :param expanded_search_filter: Expands the search filter for each record.
+        :param option_basedn: The value of the basedn option or :const:`None`, if the option is not set.
+        :return: An iterable stream of joined records in the order they were received.
+
+        """
+        def get_requests():
+            for record in records:
+                domain = expanded_domain.get_value(record)
+                if domain is None:
+                    continue
+                search_filter = expanded_search_filter.get_value(record)
+                if len(search_filter) == 0:
+                    continue
+                yield domain, (record, domain, search_filter)
+            return
+
+        def join_record(connection, request):
+            record, domain, search_filter = request
+            return list(self._join_record(connection_pool, connection, record, domain, search_filter, option_basedn))
+
+        for joined_records in connection_pool.fan_out(join_record, get_requests(), self.concurrency):
+            for record in joined_records:
+                yield record
+
+        return
+
+    def _stream_pipelined(self, records, connection_pool, expanded_domain, expanded_search_filter, option_basedn):
+        """ Joins records with the results of searches pipelined by an app.SearchPipeline.
+
+        :param records: An iterable stream of events from the command pipeline.
+        :param connection_pool: The open connection pool from which connections are selected.
+        :param expanded_domain: Expands the domain name for each record.
+        :param expanded_search_filter: Expands the search filter for each record.
+        :param option_basedn: The value of the basedn option or :const:`None`, if the option is not set.
+        :return: An iterable stream of joined records in the order they were received.
+
+        """
+        attribute_names = connection_pool.attributes
+        entry_cache = connection_pool.entry_cache
+        search_pipeline = app.SearchPipeline(self.pipeline, connection_pool.configuration.paged_size)
+
+        def get_requests():
+            for record in records:
+                domain = expanded_domain.get_value(record)
+                if domain is None:
+                    continue
+                search_filter = expanded_search_filter.get_value(record)
+                if len(search_filter) == 0:
+                    continue
+                connection = connection_pool.select_pipelined(domain)
+                if not connection:
+                    self.logger.warning('search="%s": domain="%s" is not configured', search_filter, domain)
+                    continue
+                basedn = option_basedn if option_basedn else connection_pool.basedns[domain]
+                search_base = app.ExpandedString(basedn).get_value(record)
+                key = 'ldapfilter', domain, search_base, self.scope, search_filter, attribute_names, self.decode
+                if entry_cache is not None:
+                    entries = entry_cache.get(*key)
+                    if entries is not None:
+                        yield (record, key, entries, connection), None, None
+                        continue
+                yield (record, key, None, connection), connection, dict(
+                    search_base=search_base, search_filter=search_filter, search_scope=self.scope,
+                    attributes=attribute_names)
+            return
+
+        for (record, key, entries, connection), response in search_pipeline.search(get_requests()):
+            if response is not None:
+                entries = list(filter(None, (app.get_attributes(self, entry) for entry in response)))
+                if entry_cache is not None:
+                    entry_cache.set(entries, *key)
+            for attributes in entries:
+                self._augment_record(record, attributes, attribute_names, connection)
+                yield record.copy()
+
+        return
+
+    def _augment_record(self, record, attributes, attribute_names, connection):
+        """
+        :param record: The record to join with :paramref:`attributes`.
+        :param attributes: The attributes of an entry matching the search filter for :paramref:`record`.
+        :param attribute_names: The names of the attributes to write to :paramref:`record`.
+        :param connection: The connection from which :paramref:`attributes` were read. Values are normalized according
+            to the schema of its server.
+        :return: `None`.
+
+        """
+        normalize_value = app.get_attribute_normalizer(connection.server.schema).normalize_value
+
+        for name in attribute_names:
+            record[name] = normalize_value(name, attributes.get(name, ''))
+
+        return
+
+    def _search_entries(self, connection_pool, connection, domain, search_base, search_filter):
+        """
+        :param connection_pool: The open connection pool from which :paramref:`connection` was selected.
+        :param connection: A connection to the directory service for :paramref:`domain`.
+        :param domain: The domain to search.
+        :param search_base: The starting point for the search.
+        :param search_filter: The expanded search filter.
+        :return: An iterable stream of the attributes of each entry matching :paramref:`search_filter`.
+
+        """
+        attribute_names = connection_pool.attributes
+        entry_cache = connection_pool.entry_cache
+
+        if entry_cache is not None:
+            key = 'ldapfilter', domain, search_base, self.scope, search_filter, attribute_names, self.decode
+            entries = entry_cache.get(*key)
+            if entries is not None:
+                for attributes in entries:
+                    yield attributes
+                return
+            entries = []
+
+        entry_generator = connection.extend.standard.paged_search(
+            search_base=search_base, search_filter=search_filter, search_scope=self.scope,
+            attributes=attribute_names, paged_size=connection_pool.configuration.paged_size)
+
+        for entry in entry_generator:
+            attributes = app.get_attributes(self, entry)
+            if not attributes:
+                continue
+            yield attributes
+            if entry_cache is not None:
+                entries.append(attributes)
+
+        if entry_cache is not None:
+            entry_cache.set(entries, *key)
+
+        return
+
+    def __init__(self):
+        super(LdapFilterCommand, self).__init__()
+        self.connection_pool = None
+        self.option_basedn = None
+        return
+
     # endregion
 
 dispatch(LdapFilterCommand, module_name=__name__)
@@ -9,12 +9,12 @@ import app
 import ldap3
 
 from splunklib.searchcommands import dispatch, StreamingCommand, Configuration, Option, validators
-from collections import namedtuple, OrderedDict
-from itertools import chain, islice
-from app.six.moves import filter, map
+from collections import deque, namedtuple, OrderedDict
+from itertools import chain
+from app.six.moves import map
 from app.six import iteritems, string_types
 
-@Configuration()
+@Configuration(distributed=False)
 class LdapGroupCommand(StreamingCommand):
     """  Filters and augments events with information from Active Directory.
 
@@ -26,6 +26,13 @@ class LdapGroupCommand(StreamingCommand):
     """
     # region Command options
 
+    cache_ttl = Option(
+        doc=''' Specifies the number of seconds that group memberships and the direct members of each nested group
+        are cached and shared with other searches. A value of 0 disables the cache.
+        **Default:** The value of cache_ttl as specified in the configuration stanza for domain.
+        ''',
+        default=0, validate=validators.Integer(minimum=0))
+
     debug = Option(
         doc=''' True, if the logging_level should be set to DEBUG; otherwise False.
         **Default:** The current value of logging_level.
@@ -43,11 +50,44 @@ class LdapGroupCommand(StreamingCommand):
         ''',
         default='default')
 
+    expansion = Option(
+        doc=''' Specifies how nested group members are found. With `chain` all members of a group are read with a
+        single search using the Active Directory LDAP_MATCHING_RULE_IN_CHAIN matching rule and the nesting of groups is
+        reconstructed from the memberOf values of the members. With `recursive` the members of each nested group are
+        read with a separate search. When maxdepth or maxmembers is set, `recursive` is used so that the groups beyond
+        those limits are not read.
+        **Default:** chain.
+        ''',
+        default='chain', validate=validators.Set('chain', 'recursive'))
+
     groupdn = Option(
         doc=''' Specifies the name of the field holding the distinguished names of the group to expand.
         ''',
         default='distinguishedName')
 
+    maxdepth = Option(
+        doc=''' Specifies the maximum depth of group nesting to expand. Direct members are at depth 1. Groups at the
+        maximum depth are listed as members, but their own members are not. A value of 0 expands all nested groups.
+        **Default:** 0.
+        ''',
+        default=0, validate=validators.Integer(minimum=0))
+
+    maxmembers = Option(
+        doc=''' Specifies the maximum number of members to list for a group. A warning is logged when members are
+        omitted. A value of 0 lists all members.
+        **Default:** 0.
+        ''',
+        default=0, validate=validators.Integer(minimum=0))
+
+    rows = Option(
+        doc=''' True, if one record should be written for each member of a group; otherwise, False, if all members
+        should be written as multivalue fields of one record. Each member record is a copy of the input record with
+        the fields member_dn, member_domain, member_name, member_type, and member_of; the DN of the group the member
+        was found in. Group nesting errors are logged rather than written.
+        **Default:** False.
+        ''',
+        default=False, validate=validators.Boolean())
+
     # endregion
 
     # region Command implementation
@@ -61,20 +101,33 @@ class LdapGroupCommand(StreamingCommand):
     GroupMembership = namedtuple('GroupMemberList', (
         'cycles', 'direct', 'nested'))
 
+    matching_rule_in_chain = '1.2.840.113556.1.4.1941'
+
+    member_attributes = 'groupType', 'msDS-PrincipalName', 'objectSid', 'primaryGroupID', 'sAMAccountName'
+
+    membership_fields = 'errors', 'member_dn', 'member_domain', 'member_name', 'member_type', 'mv_combo'
+
     def stream(self, records):
         """
         :param records: An iterable stream of events from the command pipeline.
         :return: `None`.
 
         """
-        configuration = app.Configuration(self, is_expanded=True)
-        expanded_domain = app.ExpandedString(self.domain)
         search_scope = ldap3.BASE
         search_filter = '(objectCategory=Group)'
         attributes = ['objectSid']
 
+        if self.connection_pool is None:  # we're processing the first chunk of records
+            configuration = app.Configuration(self, is_expanded=True)
+            self.connection_pool = configuration.open_connection_pool(attributes)
+
+        configuration = self.connection_pool.configuration
+        expanded_domain = app.ExpandedString(self.domain)
+        self.names = set()  # names are skipped when repeated within a chunk, not across chunks
+        self.graph = {}  # the entry cache, if enabled, shares group members across chunks
+
         try:
-            with configuration.open_connection_pool(attributes) as connection_pool:
+            with self.connection_pool as connection_pool:
 
                 for record in records:
 
@@ -97,8 +150,20 @@ class LdapGroupCommand(StreamingCommand):
                         self.logger.warning('groupdn="%s": domain="%s" is not configured', self.groupdn, domain)
                         continue
 
+                    entry_cache = connection_pool.entry_cache
+                    cache_key = 'ldapgroup', domain, name, self.decode, self.maxdepth, self.maxmembers
+
+                    if entry_cache is not None and not self.rows:
+                        fields = entry_cache.get(*cache_key)
+                        if fields is not None:
+                            fields['errors'] = [tuple(error) for error in fields['errors']]
+                            record.update(fields)
+                            yield record
+                            self.names.add(name)
+                            continue
+
                     self.paged_size = configuration.paged_size
-                    self.basedn = configuration.basedn
+                    self.basedn = connection_pool.basedns[domain]
 
                     try:
                         connection.search(name, search_filter, search_scope, attributes=attributes)
@@ -119,10 +184,17 @@ class LdapGroupCommand(StreamingCommand):
 
                     if do_attributes:
                         group = LdapGroupCommand.Group(do['dn'], do_attributes['objectSid'])
-                        membership = LdapGroupCommand.GroupMembership(cycles=OrderedDict(), direct=[], nested=[])
-                        self._get_group_membership(connection, group, membership)
-                        LdapGroupCommand._augment_record(record, group, membership, self.logger, name)
-                        yield record
+                        if self.rows:
+                            for member_record in self._get_member_records(connection, domain, group, record):
+                                yield member_record
+                        else:
+                            membership = LdapGroupCommand.GroupMembership(cycles=OrderedDict(), direct=[], nested=[])
+                            self._get_group_membership(connection, domain, group, membership)
+                            LdapGroupCommand._augment_record(record, group, membership, self.logger, name)
+                            if entry_cache is not None:
+                                fields = {field: record[field] for field in LdapGroupCommand.membership_fields}
+                                entry_cache.set(fields, *cache_key)
+                            yield record
 
                     self.names.add(name)
 
@@ -133,6 +205,8 @@ class LdapGroupCommand(StreamingCommand):
 
     def __init__(self):
         super(LdapGroupCommand, self).__init__()
+        self.connection_pool = None
+        self.graph = {}
         self.paged_size = None
         self.names = set()
         self.basedn = None
@@ -148,7 +222,7 @@ class LdapGroupCommand(StreamingCommand):
 
         """
         
-        group_id = group.object_sid[group.object_sid.rindex('-') + 1:]
+        group_id = LdapGroupCommand._get_group_id(group)
 
         record['errors'] = [
             (x, y) for x, y in iteritems(membership.cycles) if len(y) > 0]
@@ -163,8 +237,8 @@ class LdapGroupCommand(StreamingCommand):
             x.sam_account_name for x in chain(membership.direct, membership.nested)]
 
         record['member_type'] = member_type = [
-            'PRIMARY' if group_id == x.primary_group_id else y for x, y in chain(
-                map(lambda z: (z, 'DIRECT'), membership.direct), map(lambda z: (z, 'NESTED'), membership.nested))]
+            LdapGroupCommand._get_member_type(group_id, x, y) for x, y in chain(
+                map(lambda z: (z, 1), membership.direct), map(lambda z: (z, 2), membership.nested))]
 
         # Parsing the field list for mv_combo field. If field list contains another list, parse them into single list. Parsing level one only.
         def parse_fields(field):
@@ -193,33 +267,145 @@ class LdapGroupCommand(StreamingCommand):
         return
 
     @staticmethod
-    def _create_group_filter(members, start, stop):
-        return filter(lambda x: x.is_group, islice(members, start, stop))
+    def _get_group_id(group):
+        return group.object_sid[group.object_sid.rindex('-') + 1:]
 
-    def _get_group_membership(self, connection, group, membership):
-        self._get_direct_group_members(connection, group, membership.cycles, membership.direct)
-        groups = LdapGroupCommand._create_group_filter(membership.direct, 0, len(membership.direct))
-        self._get_nested_group_members(connection, groups, membership.cycles, membership.nested)
+    @staticmethod
+    def _get_member_type(group_id, member, depth):
+        if group_id == member.primary_group_id:
+            return 'PRIMARY'
+        return 'DIRECT' if depth == 1 else 'NESTED'
+
+    def _get_member_lookup(self, connection, domain, group):
+        """ Returns a function that gets the direct members of a group, reading them from the directory as required.
 
-    def _get_direct_group_members(self, connection, group, cycles, members):
         """
-        :param members:
-        :param group:
-        :param connection:
-        :return: `None`.
+        entry_cache = self.connection_pool.entry_cache
+
+        # A chain search reads every transitive member before maxdepth and maxmembers apply
+        is_bounded = self.maxdepth > 0 or self.maxmembers > 0
+
+        if self.expansion == 'chain' and not is_bounded and not self._is_expanded(entry_cache, domain, group):
+            graph = self._get_transitive_group_members(connection, group)
+            if graph is not None:
+                # Record the direct members of group and of every group nested in it, including those with no members
+                for dn in chain((group.dn,), (x.dn for x in chain.from_iterable(graph.values()) if x.is_group)):
+                    key = dn.lower()
+                    if (domain, key) not in self.graph:
+                        self._set_group_members(entry_cache, domain, key, graph.get(key, []))
+
+        def get_members(x):
+            key = x.dn.lower()
+            members = self._get_cached_group_members(entry_cache, domain, key)
+            if members is None:
+                members = self._search_group_members(connection, '(memberOf={0})'.format(
+                    app.escape_assertion_value(x.dn)))
+                self._set_group_members(entry_cache, domain, key, members)
+            return members
+
+        return get_members
+
+    def _get_group_membership(self, connection, domain, group, membership):
+
+        for member, depth, parent in self._traverse_group(connection, domain, group, membership.cycles):
+            (membership.direct if depth == 1 else membership.nested).append(member)
+
+        return
+
+    def _get_cached_group_members(self, entry_cache, domain, key):
+        """ Gets the direct members of a group from the membership graph or--failing that--the entry cache.
+
+        :param entry_cache: The entry cache or :const:`None`, if caching is disabled.
+        :param domain: The domain of the group.
+        :param key: The lower case distinguished name of the group.
+        :return: A list of GroupMember objects or :const:`None`, if the members of the group have not been read.
 
         """
-        if group.dn in cycles:
-            return
+        members = self.graph.get((domain, key))
+
+        if members is None and entry_cache is not None:
+            values = entry_cache.get('ldapgroup-members', domain, key, self.decode)
+            if values is not None:
+                members = self.graph[domain, key] = [LdapGroupCommand.GroupMember(*value) for value in values]
+
+        return members
 
-        search_filter = '(memberOf={0})'.format(app.escape_assertion_value(group.dn))
-        cycles[group.dn] = []
+    def _get_member_records(self, connection, domain, group, record):
+        """ Generates one copy of record for each member of group.
 
+        :return: An iterable stream of records.
+
+        """
+        group_id = LdapGroupCommand._get_group_id(group)
+        cycles = OrderedDict()
+
+        for member, depth, parent in self._traverse_group(connection, domain, group, cycles):
+            member_record = dict(record)
+            member_record['member_dn'] = member.dn
+            member_record['member_domain'] = member.netbios_domain_name
+            member_record['member_name'] = member.sam_account_name
+            member_record['member_of'] = parent.dn
+            member_record['member_type'] = LdapGroupCommand._get_member_type(group_id, member, depth)
+            yield member_record
+
+        for dn, members in iteritems(cycles):
+            if members:
+                self.logger.warning('group "%s" has members that were already expanded: %s', dn, members)
+
+        return
+
+    def _get_transitive_group_members(self, connection, group):
+        """ Reads all direct and nested members of a group with one search and groups them by the groups they belong to.
+
+        The LDAP_MATCHING_RULE_IN_CHAIN matching rule walks the chain of memberOf links on the server. Each member is
+        returned once with its memberOf values and hence its place in the nesting of groups below :paramref:`group` is
+        known without further searches.
+
+        :param connection: A connection to an LDAP directory service that is queried for group members.
+        :param group: The group to expand.
+        :return: A dictionary mapping the lower case distinguished name of :paramref:`group` and each of its nested
+            groups to a list of their direct members or :const:`None`, if the directory server does not support
+            LDAP_MATCHING_RULE_IN_CHAIN.
+
+        """
+        search_filter = '(memberOf:{0}:={1})'.format(
+            LdapGroupCommand.matching_rule_in_chain, app.escape_assertion_value(group.dn))
+
+        graph = {}
+
+        try:
+            for member, member_of in self._search_group_members(connection, search_filter, ('memberOf',)):
+                if isinstance(member_of, string_types):
+                    member_of = (member_of,)
+                for dn in member_of or ():
+                    graph.setdefault(dn.lower(), []).append(member)
+        except ldap3.core.exceptions.LDAPNoSuchObjectResult:
+            raise
+        except ldap3.core.exceptions.LDAPOperationResult as error:
+            self.logger.warning(
+                'Falling back to expansion=recursive for group "%s" because a search using '
+                'LDAP_MATCHING_RULE_IN_CHAIN failed: %s', group.dn, error)
+            return None
+
+        return graph
+
+    def _search_group_members(self, connection, search_filter, attributes=()):
+        """ Searches for group members.
+
+        :param connection: A connection to an LDAP directory service that is queried for group members.
+        :param search_filter: An LDAP search filter selecting group members.
+        :param attributes: Attributes to read in addition to those required to create a GroupMember.
+        :return: A list of GroupMember objects or--when :paramref:`attributes` is not empty--a list of tuples pairing
+            each GroupMember object with the values of :paramref:`attributes`.
+
+        """
         entry_generator = connection.extend.standard.paged_search(
             paged_size=self.paged_size,
             search_base=self.basedn,
             search_filter=search_filter,
-            attributes=('groupType', 'msDS-PrincipalName', 'objectSid', 'primaryGroupID', 'sAMAccountName'))
+            attributes=LdapGroupCommand.member_attributes + attributes)
+
+        members = []
 
         try:
             for entry in entry_generator:
@@ -241,32 +427,87 @@ class LdapGroupCommand(StreamingCommand):
                     primary_group_id=entry_attributes.get('primaryGroupID', ''),
                     sam_account_name=entry_attributes.get('sAMAccountName', ''))
 
-                if member.is_group and member.dn in cycles:
-                    # There's a cycle from group to member
-                    cycles[group.dn].append(member.dn)
-
-                members.append(member)
+                if attributes:
+                    members.append((member,) + tuple(entry_attributes.get(name) for name in attributes))
+                else:
+                    members.append(member)
         except ldap3.core.exceptions.LDAPInvalidFilterError as error:
             error.message += ': {0}'.format(search_filter)
             raise error
 
+        return members
+
+    def _is_expanded(self, entry_cache, domain, group):
+        """ Determines whether the direct members of a group and of every group nested in it have been read.
+
+        :return: :const:`True`, if :paramref:`group` can be expanded without searching the directory; otherwise,
+            :const:`False`.
+
+        """
+        pending, visited = [group.dn.lower()], set()
+
+        while pending:
+            key = pending.pop()
+            if key in visited:
+                continue
+            visited.add(key)
+            members = self._get_cached_group_members(entry_cache, domain, key)
+            if members is None:
+                return False
+            pending.extend(x.dn.lower() for x in members if x.is_group)
+
+        return True
+
+    def _set_group_members(self, entry_cache, domain, key, members):
+        """ Adds the direct members of a group to the membership graph and the entry cache.
+
+        :return: `None`.
+
+        """
+        self.graph[domain, key] = members
+        if entry_cache is not None:
+            entry_cache.set(members, 'ldapgroup-members', domain, key, self.decode)
         return
 
-    def _get_nested_group_members(self, connection, groups, cycles, members):
-        """ Adds the members of each group in member_slice to member_list recursively.
-        :param members: A list of GroupMember objects.
-        :param groups: A slice of the GroupMember objects in member_list or--on first call--some other sequence
-        of GroupMember objects.
+    def _traverse_group(self, connection, domain, group, cycles):
+        """ Walks the members of a group and its nested groups breadth first.
+
+        Each group is expanded once. When a group is found again--because of a cycle or because it is nested in more
+        than one group--it is listed as a member and recorded in :paramref:`cycles`, but not expanded again. The walk
+        is bounded by :attr:`maxdepth` and :attr:`maxmembers`.
+
         :param connection: A connection to an LDAP directory service that is queried for group members.
-        :return: `None`.
+        :param domain: The domain of :paramref:`group`.
+        :param group: The group to expand.
+        :param cycles: An ordered dictionary that receives the list of groups found again in each expanded group.
+        :return: An iterable stream of `(member, depth, parent)` tuples, where `parent` is the group or GroupMember
+            that lists `member` and `depth` is 1 for the direct members of :paramref:`group`.
 
         """
-        start = len(members)
-        for group in groups:
-            self._get_direct_group_members(connection, group, cycles, members)
-            groups = LdapGroupCommand._create_group_filter(members, start, len(members))
-            self._get_nested_group_members(connection, groups, cycles, members)
+        get_members = self._get_member_lookup(connection, domain, group)
+        pending = deque(((group, 0),))
+        visited = {group.dn}
+        count = 0
+
+        while pending:
+            parent, depth = pending.popleft()
+            cycles[parent.dn] = errors = []
+            depth += 1
+            for member in get_members(parent):
+                if member.is_group:
+                    if member.dn in visited:
+                        errors.append(member.dn)
+                    elif self.maxdepth == 0 or depth < self.maxdepth:
+                        visited.add(member.dn)
+                        pending.append((member, depth))
+                if count == self.maxmembers > 0:
+                    self.logger.warning('group "%s" has more than maxmembers=%d members', group.dn, self.maxmembers)
+                    return
+                count += 1
+                yield member, depth, parent
+
         return
+
     # endregion
 
 dispatch(LdapGroupCommand, module_name=__name__)
@@ -8,15 +8,15 @@ import default
 
 from splunklib.searchcommands import dispatch, GeneratingCommand, Configuration, Option, validators
 from collections import OrderedDict
-from itertools import chain
-from base64 import b64encode
 from json import JSONEncoder
 from time import time
 import ldap3
+import re
 import app
-import datetime
-from app.six.moves import map
-from app.six import iteritems, b, binary_type
+from app.six import b
+
+_json_encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))  # encodes _raw; created once, not per entry
+
 
 @Configuration(retainsevents=True)
 class LdapSearchCommand(GeneratingCommand):
@@ -78,6 +78,32 @@ class LdapSearchCommand(GeneratingCommand):
         ''',
         default=0, validate=validators.Integer(minimum=0))
 
+    fields = Option(
+        doc=''' Specifies a comma separated list of the attributes to be written as fields. Attributes in attrs, but not
+        in fields are written only to _raw.
+        **Default:** The attributes in attrs.
+        ''',
+        validate=validators.List())
+
+    raw = Option(
+        doc=''' Specifies what is written for each entry. With true the attributes of an entry are written as JSON to
+        _raw and as fields. With false they are written as fields only, which about halves the size and encoding time
+        of large exports. With compact they are written to _raw only; use spath to extract them.
+        **Default:** true.
+        ''',
+        default='true', validate=validators.Set('true', 'false', 'compact'))
+
+    incremental = Option(
+        doc=''' True, if only the entries that changed since the last incremental search should be returned.
+        Changes are tracked with an Active Directory DirSync cookie saved for each combination of domain, basedn,
+        search, and attrs. The first search--or any search whose cookie is rejected by the server--returns all matching
+        entries. Changed entries include only the attributes that changed and deleted entries are returned with
+        isDeleted=TRUE. The basedn must be the root of a naming context and scope must be sub. If limit stops the search
+        early, the cookie is not advanced.
+        **Default:** false.
+        ''',
+        default=False, validate=validators.Boolean())
+
     def generate(self):
         """
         :return: `None`.
@@ -88,6 +114,7 @@ class LdapSearchCommand(GeneratingCommand):
         try:
             with ldap3.Connection(
                     configuration.server,
+                    client_strategy=ldap3.ASYNC,  # so that the next page is received while this one is written
                     read_only=True,
                     raise_exceptions=True,
                     user=configuration.credentials.username,
@@ -95,11 +122,22 @@ class LdapSearchCommand(GeneratingCommand):
 
                 attribute_names = app.get_normalized_attribute_names(self.attrs, connection, configuration)
 
-                entry_generator = connection.extend.standard.paged_search(
-                    search_base=self.basedn, search_filter=self.search, search_scope=self.scope, attributes=self.attrs,
-                    paged_size=configuration.paged_size)
-
-                encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
+                if self.incremental:
+                    entry_generator = self._dir_sync(connection, configuration)
+                else:
+                    entry_generator = connection.extend.standard.paged_search(
+                        search_base=self.basedn, search_filter=self.search, search_scope=self.scope,
+                        attributes=self.attrs, paged_size=configuration.paged_size, prefetch=True)
+
+                if self.raw == 'compact':
+                    field_names = ()
+                elif self.fields is not None:
+                    field_names = app.get_normalized_attribute_names(self.fields, connection, configuration)
+                else:
+                    field_names = attribute_names
+
+                normalizer = app.get_attribute_normalizer(connection.server.schema)
+                raw = self.raw != 'false'
                 time_stamp = time()
                 serial_number = 0
 
@@ -108,7 +146,8 @@ class LdapSearchCommand(GeneratingCommand):
                     if attributes:
                         dn = entry['dn']
                         yield LdapSearchCommand._record(
-                            serial_number, time_stamp, connection.server.host, dn, attributes, attribute_names, encoder)
+                            serial_number, time_stamp, connection.server.host, dn, attributes, field_names,
+                            field_names is not attribute_names, normalizer, raw)
                         serial_number += 1
                         GeneratingCommand.flush
                     if self.limit and serial_number == self.limit:
@@ -122,38 +161,88 @@ class LdapSearchCommand(GeneratingCommand):
 
         return
 
-    @staticmethod
-    def _record(serial_number, time_stamp, host, dn, attributes, attribute_names, encoder):
+    def _dir_sync(self, connection, configuration):
+        """ Searches for the entries that changed since the last incremental search with the same options.
+
+        :param connection: An open connection to the directory service for `configuration.domain`.
+        :param configuration: The configuration selected for this search.
+        :return: An iterable stream of search results. The DirSync cookie returned with them is saved when the stream
+            is exhausted.
+
+        """
+        if self.scope != ldap3.SUBTREE:
+            message = 'An incremental search requires scope=sub'
+            self.error_exit(ValueError(message), message)
+
+        cookie_store = app.CookieStore(app.get_cache_path('dirsync'), self.logger)
+        key = configuration.domain, self.basedn, self.search, ','.join(self.attrs)
+        cookie = cookie_store.load(*key)
+
+        def loop(cookie):
+            # Object security lets accounts without the Replicating Directory Changes right synchronize the entries
+            # they can read and whole values are returned for changed multi-valued attributes like member
+            dir_sync = connection.extend.microsoft.dir_sync(
+                self.basedn, self.search, attributes=self.attrs, cookie=cookie, object_security=True,
+                incremental_values=False)
+            return dir_sync, dir_sync.loop()
+
+        if cookie is None:
+            self.logger.info('Synchronizing all entries: domain="%s" basedn="%s"', configuration.domain, self.basedn)
+            dir_sync, response = loop(None)
+        else:
+            try:
+                dir_sync, response = loop(cookie)
+            except ldap3.core.exceptions.LDAPOperationResult as error:
+                self.logger.warning(
+                    'DirSync cookie rejected, synchronizing all entries: domain="%s" basedn="%s": %s',
+                    configuration.domain, self.basedn, error)
+                cookie_store.remove(*key)
+                dir_sync, response = loop(None)
+
+        while True:
+            for entry in response:
+                if entry['type'] == 'searchResEntry':
+                    entry['dn'] = LdapSearchCommand._extended_dn_prefix.sub('', entry['dn'])
+                yield entry
+            if not dir_sync.more_results:
+                break
+            response = dir_sync.loop()
+
+        cookie_store.save(dir_sync.cookie, *key)
+        return
+
+    _extended_dn_prefix = re.compile(r'^(?:<[^>]*>;)+')  # DirSync returns distinguished names in extended form
 
-        # Base-64 encode binary values (they're stored as str values--byte strings--not unicode values)
+    @staticmethod
+    def _record(serial_number, time_stamp, host, dn, attributes, field_names, is_projection, normalizer, raw):
 
-        for name, value in iteritems(attributes):
-            if isinstance(value, binary_type):
-                attributes[name] = b64encode(value).decode('utf-8')
-            elif isinstance(value, datetime.datetime):
-            	attributes[name] = str(value)
-            elif isinstance(value, list):
-                for i in range(len(value)):
-                    if isinstance(value[i], binary_type):
-                        value[i] = b64encode(value[i]).decode('utf-8')
-                    elif isinstance(value[i], datetime.datetime):
-                        value[i] = str(value[i])
+        # Base-64 encode binary values and convert time values to text
 
-        raw = encoder.encode(attributes)
+        normalizer.normalize(attributes)
+        raw = _json_encoder.encode(attributes) if raw else None
 
         # Formulate record
 
-        if serial_number > 0:
+        if serial_number > 0 and not is_projection:
+            # No projection: the attributes are the fields; those not in the field list of the first record are ignored
             attributes['_serial'] = serial_number
             attributes['_time'] = time_stamp
-            attributes['_raw'] = raw
+            if raw is not None:
+                attributes['_raw'] = raw
             attributes['host'] = host
             attributes['dn'] = dn
             return attributes
 
-        record = OrderedDict(chain(
-            (('_serial', serial_number), ('_time', time_stamp), ('_raw', raw), ('host', host), ('dn', dn)),
-            map(lambda name: (name, attributes.get(name, '')), attribute_names)))
+        record = OrderedDict()
+        record['_serial'] = serial_number
+        record['_time'] = time_stamp
+        if raw is not None:
+            record['_raw'] = raw
+        record['host'] = host
+        record['dn'] = dn
+
+        for name in field_names:
+            record[name] = attributes.get(name, '')
 
         return record
 
@@ -8,12 +8,11 @@ import default
 import app
 
 from splunklib.searchcommands import dispatch, GeneratingCommand, Configuration, Option, validators
-from collections import Iterable
 from itertools import chain
-from json import JSONEncoder
-from ldap3 import Connection, BASE
+from ldap3 import Connection, ServerPool, BASE
 from ldap3.core.exceptions import LDAPException
 from ldapsearch import LdapSearchCommand
+from multiprocessing.pool import ThreadPool
 from time import time
 
 
@@ -48,21 +47,25 @@ class LdapTestConnectionCommand(GeneratingCommand):
         self.logger.debug('Command = %s', self)
         configuration = app.Configuration(self)
 
-        encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'))
         time_stamp = time()
-        serial_number = 0
+        server = configuration.server
+        servers = list(server) if isinstance(server, ServerPool) else [server]  # in configuration order
 
-        servers = configuration.server if isinstance(configuration.server, Iterable) else (configuration.server,)
         search_base = configuration.basedn
         search_filter = '(objectClass=*)'
         search_scope = BASE
         attribute_names = 'distinguishedName',
 
-        records = []
-        errors = []
+        def test_connection(serial_number, server):
+            # Returns a 2-tuple: a record or None and an error message or None. Servers are tested concurrently and
+            # the availability check records the health of servers in a pool
 
-        for server in servers:
             self.logger.debug('Testing the connection to %s', server.name)
+
+            if not server.check_availability():
+                return None, 'Could not access the directory service at {0}: The server is unavailable'.format(
+                    server.name)
+
             try:
                 with Connection(
                         server,
@@ -73,25 +76,32 @@ class LdapTestConnectionCommand(GeneratingCommand):
 
                     # LDAP Guarantee: There's one and only one response to our query (proof left as an exercise)
 
-                    if connection.search(search_base, search_filter, search_scope, attributes=attribute_names):
-                        response = connection.response[0]
-                        attributes = app.get_attributes(self, response)
-                        records.append(
-                            LdapSearchCommand._record(
-                                serial_number, time_stamp, server.host, response['dn'], attributes, attribute_names,
-                                encoder))
-                    else:
-                        message = 'The directory serviced at {0} contains no entry for {1}'.format(
+                    if not connection.search(search_base, search_filter, search_scope, attributes=attribute_names):
+                        return None, 'The directory serviced at {0} contains no entry for {1}'.format(
                             server.name, search_base)
-                        errors.append((server.host, message))
-                pass
+
+                    response = connection.response[0]
+                    attributes = app.get_attributes(self, response)
+                    record = LdapSearchCommand._record(
+                        serial_number, time_stamp, server.host, response['dn'], attributes, attribute_names, False,
+                        app.get_attribute_normalizer(server.schema), True)
+                    return record, None
 
             except LDAPException as error:
-                message = 'Could not access the directory service at {0}: {1}'.format(
+                return None, 'Could not access the directory service at {0}: {1}'.format(
                     server.name, app.get_ldap_error_message(error, configuration))
-                errors.append((server.host, message))
 
-            serial_number += 1
+        if len(servers) == 1:
+            results = [test_connection(0, servers[0])]
+        else:
+            thread_pool = ThreadPool(len(servers))
+            try:
+                results = thread_pool.map(lambda item: test_connection(*item), enumerate(servers))
+            finally:
+                thread_pool.terminate()
+
+        records = [record for record, message in results if record is not None]
+        errors = [(server.host, message) for server, (record, message) in zip(servers, results) if message is not None]
 
         if errors:
             message = ' # host: '.join(chain(' ', [
@@ -4,13 +4,23 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
+from .attribute_normalizer import AttributeNormalizer, get_attribute_normalizer
 from .configuration import Configuration
+from .configuration_snapshot import ConfigurationSnapshot, get_configuration_snapshot
 from .connection_pool import ConnectionPool
+from .cookie_store import CookieStore
+from .entry_cache import EntryCache
 from .expanded_string import ExpandedString
 from .formatting_extensions import formatting_extensions
+from .lru_cache import LruCache
+from .search_pipeline import SearchPipeline
+from .server_health import HealthOrderedServerPool, ServerHealth
 
 import ldap3
-from .six import text_type, iterkeys, PY3
+import os
+import re
+import tempfile
+from .six import text_type, iterkeys, unichr, PY3
 from .six.moves import filterfalse
 
 _character_map = (
@@ -272,6 +282,12 @@ _character_map = (
     b'\\FF')  # ÿ
 
 
+_escape_table = {
+    o: escaped_character.decode('utf-8') for o, escaped_character in enumerate(_character_map)
+    if escaped_character.decode('latin-1') != unichr(o)}
+
+_special_characters = re.compile('[' + ''.join(re.escape(unichr(o)) for o in sorted(_escape_table)) + ']')
+
 _required_features = (  # Features that are common to Windows Server 2008-2012 R2 Active Directory directory services
     '1.2.840.113556.1.4.800',   # LDAP_CAP_ACTIVE_DIRECTORY_OID
     '1.2.840.113556.1.4.1791',  # LDAP_CAP_ACTIVE_DIRECTORY_LDAP_INTEG_OID
@@ -291,20 +307,57 @@ def escape_assertion_value(value):
     """
     value = text_type(value)
 
-    def escape_character(c):
-        o = ord(c)
-        if o > 0xFF:
-            escaped_character = c.encode('utf-8')
-        else:
-            escaped_character = _character_map[o]
-        return escaped_character
-
-    escaped_value = b''.join([escape_character(c) for c in value])
-    
-    if PY3:
-        escaped_value = escaped_value.decode('utf-8')
-    
-    return escaped_value
+    if _special_characters.search(value) is not None:
+        value = value.translate(_escape_table)
+
+    if not PY3:
+        value = value.encode('utf-8')
+
+    return value
+
+
+def escape_assertion_values(values):
+    """ Escapes the characters of a sequence of assertion values as per `RFC-4515 <http://goo.gl/iW5xIE>`_.
+
+    Each distinct value is escaped once.
+
+    :param values: Assertion values to escape
+    :return: List of escaped assertion values in the order of :paramref:`values`
+    :rtype: list
+
+    """
+    escaped_values = {}
+    result = []
+
+    for value in values:
+        try:
+            escaped_value = escaped_values[value]
+        except KeyError:
+            escaped_value = escaped_values[value] = escape_assertion_value(value)
+        result.append(escaped_value)
+
+    return result
+
+
+def get_cache_path(*names):
+    """ Gets the path to a file or directory that SA-ldapsearch commands persist between invocations.
+
+    Cached data is stored under `$SPLUNK_HOME/var/run/splunk/SA-ldapsearch`. If `SPLUNK_HOME` is undefined--as is
+    the case when a command is run outside of Splunk--the system temporary directory is used instead.
+
+    :param names: Path components relative to the SA-ldapsearch cache directory.
+    :return: Path to the named cache file or directory.
+    :rtype: str
+
+    """
+    splunk_home = os.environ.get('SPLUNK_HOME')
+
+    if splunk_home:
+        directory = os.path.join(splunk_home, 'var', 'run', 'splunk', 'SA-ldapsearch')
+    else:
+        directory = os.path.join(tempfile.gettempdir(), 'SA-ldapsearch')
+
+    return os.path.join(directory, *names)
 
 
 def get_attributes(command, result):
@@ -0,0 +1,125 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from base64 import b64encode
+from weakref import WeakKeyDictionary
+import datetime
+
+from .six import binary_type, integer_types, iteritems, text_type
+
+
+class AttributeNormalizer(object):
+    """ Converts the attribute values of directory entries to values that can be written as JSON and search results.
+
+    Binary values are Base-64 encoded and time values are converted to text. All other values are left as they are.
+    These are the conversions the ldapsearch, ldapfetch, and ldapfilter commands apply to every entry they write.
+
+    Most attribute values are text. A single value of a type that needs no conversion is recognized with one type test
+    and a list of them with one set of value types. Only values of the attributes whose syntax in `schema` is binary
+    or time-valued are converted without first checking whether they need conversion.
+
+    """
+    binary_syntaxes = frozenset((
+        '1.3.6.1.4.1.1466.115.121.1.5',   # Binary
+        '1.3.6.1.4.1.1466.115.121.1.24',  # Generalized Time
+        '1.3.6.1.4.1.1466.115.121.1.40',  # Octet String
+        '1.3.6.1.4.1.1466.115.121.1.53',  # UTC Time
+        '1.2.840.113556.1.4.903',         # Object(DN-Binary)
+        '1.2.840.113556.1.4.907'          # String(NT-Sec-Desc)
+    ))
+
+    plain_types = frozenset(integer_types + (bool, dict, float, text_type, type(None)))
+
+    def __init__(self, schema=None):
+        self.binary_attributes = AttributeNormalizer._get_binary_attributes(schema)
+
+    def normalize(self, attributes):
+        """ Converts the values of all attributes in place.
+
+        :param dict attributes: The attributes of a directory entry.
+        :return: :paramref:`attributes`.
+
+        """
+        binary_attributes = self.binary_attributes
+        plain_types = AttributeNormalizer.plain_types
+        normalize_value = AttributeNormalizer._normalize_value
+
+        for name, value in iteritems(attributes):
+            value_t = type(value)
+            if value_t in plain_types:
+                continue
+            if value_t is list and name not in binary_attributes and plain_types.issuperset(map(type, value)):
+                continue
+            attributes[name] = normalize_value(value)
+
+        return attributes
+
+    def normalize_value(self, name, value):
+        """ Converts the value of an attribute.
+
+        :param name: The name of the attribute.
+        :param value: The value of the attribute.
+        :return: The converted :paramref:`value`. Lists are converted in place.
+
+        """
+        value_t = type(value)
+        if value_t in AttributeNormalizer.plain_types:
+            return value
+        if value_t is list and name not in self.binary_attributes and AttributeNormalizer.plain_types.issuperset(
+                map(type, value)):
+            return value
+        return AttributeNormalizer._normalize_value(value)
+
+    # region Privates
+
+    @staticmethod
+    def _get_binary_attributes(schema):
+
+        if schema is None or not schema.attribute_types:
+            return frozenset()
+
+        binary_syntaxes = AttributeNormalizer.binary_syntaxes
+        names = set()
+
+        for attribute_type in schema.attribute_types.values():
+            if attribute_type.syntax in binary_syntaxes and attribute_type.name:
+                names.update(attribute_type.name)
+
+        return frozenset(names)
+
+    @staticmethod
+    def _normalize_value(value):
+        if isinstance(value, binary_type):
+            return b64encode(value).decode('utf-8')
+        if isinstance(value, datetime.datetime):
+            return str(value)
+        if isinstance(value, list):
+            for i in range(len(value)):
+                if isinstance(value[i], binary_type):
+                    value[i] = b64encode(value[i]).decode('utf-8')
+                elif isinstance(value[i], datetime.datetime):
+                    value[i] = str(value[i])
+        return value
+
+    # endregion
+
+
+_normalizers = WeakKeyDictionary()  # schema -> AttributeNormalizer
+_default_normalizer = AttributeNormalizer()
+
+
+def get_attribute_normalizer(schema):
+    """ Gets the :class:`AttributeNormalizer` for a schema, which is shared by all commands and connections using it.
+
+    :param schema: An :class:`ldap3.protocol.rfc4512.SchemaInfo` or :const:`None`, if no schema was read.
+    :return: An :class:`AttributeNormalizer`.
+
+    """
+    if schema is None:
+        return _default_normalizer
+    normalizer = _normalizers.get(schema)
+    if normalizer is None:
+        normalizer = _normalizers[schema] = AttributeNormalizer(schema)
+    return normalizer
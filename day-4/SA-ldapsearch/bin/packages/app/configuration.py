@@ -10,12 +10,15 @@ import ssl
 import sys
 from functools import reduce as reduce
 
-from ldap3 import Server, Tls, core, ALL
-from splunklib.searchcommands.validators import Boolean, Integer, List, Map
+from ldap3 import core, ALL
+from splunklib.searchcommands.validators import Boolean, Integer, List, Map, Set
 from splunklib.binding import HTTPError
-from splunklib import data
 import app
-from .six import itervalues
+from .configuration_snapshot import get_configuration_snapshot
+from .schema_cache import CachingServer, SchemaCache
+from .server_health import HealthOrderedServerPool, ServerHealth
+from .shared_tls import SharedContextTls
+from .six import iteritems, itervalues
 
 
 try:
@@ -26,6 +29,9 @@ except ImportError:
 
 class Configuration(object):
     Credentials = namedtuple('Credentials', ['realm', 'username', 'password', 'authorization_id'])
+    ServerSettings = namedtuple(
+        'ServerSettings', ['domain', 'hosts', 'port', 'use_ssl', 'decode', 'schema_cache', 'strategy'])
+    server_strategies = 'first', 'round_robin'
     _tls = None
 
     def __init__(self, command, is_expanded=False):
@@ -34,6 +40,7 @@ class Configuration(object):
             command.logging_level = 'DEBUG'
 
         self._buffered_configurations = None
+        self._snapshot = get_configuration_snapshot(command.service, command.logger)
         self.command = command
         self.domain = None
         self.settings = None
@@ -42,10 +49,18 @@ class Configuration(object):
 
         self.alternatedomain = None
         self.basedn = None
-        self.server = None
+        self.server_settings = None
         self.credentials = None
         self.decode = None
         self.paged_size = None
+        self.schema_cache = None
+        self.server_strategy = None
+        self.cache_ttl = None
+        self.pipeline = None
+        self.concurrency = None
+
+        self._server = None
+        self._servers = {}  # ServerSettings -> ldap3.Server or list of ldap3.Server
 
         command.logger.debug('Command = %s', command)
 
@@ -62,6 +77,28 @@ class Configuration(object):
             self.command.name, self.server, username, self.alternatedomain, self.basedn, self.decode, self.paged_size)
         return text
 
+    @property
+    def server(self):
+        """ Gets the server or server pool for the selected domain.
+
+        Servers are created the first time they are needed and kept for the lifetime of this configuration, so that
+        selecting a domain again reuses the servers--and the DSA info and schema--read for it before.
+
+        :return: An :class:`ldap3.Server`, an :class:`app.HealthOrderedServerPool`, if the selected domain has more
+            than one host, or :const:`None`, if no domain is selected.
+
+        """
+        server = self._server
+        if server is None:
+            server_settings = self.server_settings
+            if server_settings is None:
+                return None  # no domain is selected
+            server = self._servers.get(server_settings)
+            if server is None:
+                server = self._servers[server_settings] = self._create_server(server_settings)
+            self._server = server
+        return server
+
     def open_connection_pool(self, attributes):
         return app.ConnectionPool(self, attributes)
 
@@ -83,6 +120,29 @@ class Configuration(object):
 
         return
 
+    def _create_server(self, server_settings):
+
+        formatter = app.formatting_extensions if server_settings.decode else None
+        tls = self._get_tls() if server_settings.use_ssl else None
+        schema_cache = None
+
+        if server_settings.schema_cache:
+            schema_cache = SchemaCache(app.get_cache_path('schema'), server_settings.domain, self.command.logger)
+
+        def create_server(hostname, server_health=None):
+            return CachingServer(
+                hostname, server_settings.port, server_settings.use_ssl, formatter=formatter, get_info=ALL,
+                allowed_referral_hosts=[('*', True)], tls=tls, schema_cache=schema_cache, server_health=server_health)
+
+        hosts = server_settings.hosts
+
+        if len(hosts) == 1:
+            return create_server(hosts[0])
+
+        server_health = ServerHealth(app.get_cache_path('health'), server_settings.domain, self.command.logger)
+        servers = [create_server(hostname, server_health) for hostname in hosts]
+        return HealthOrderedServerPool(servers, server_health, rotate=server_settings.strategy == 'round_robin')
+
     def _ensure_unique_configuration_names(self, domain, alternatedomain):
 
         existing_configuration = self._buffered_configurations.get(domain)
@@ -225,19 +285,15 @@ class Configuration(object):
 
         command = self.command
 
-        configuration_file = command.service.confs[str('ssl')]
-
         try:
-            app_settings = configuration_file['sslConfig']
+            app_settings = self._snapshot.get_ssl_settings('ssl')
         except KeyError as error:
             message = 'Cannot use SSL because the sslConfig stanza is missing from ssl.conf.'
             command.error_exit(error, message)
             return
 
-        configuration_file = command.service.confs[str('server')]
-
         try:
-            server_settings = configuration_file['sslConfig']
+            server_settings = self._snapshot.get_ssl_settings('server')
         except KeyError as error:
             message = 'Cannot use SSL because the sslConfig stanza is missing from server.conf.'
             command.error_exit(error, message)
@@ -316,7 +372,7 @@ class Configuration(object):
             return
 
         try:
-            tls = Tls(
+            tls = SharedContextTls(
                 ca_certs_file=ca_cert_file if ca_cert_file else None,
                 validate=ssl.CERT_REQUIRED if ssl_verify_server_cert else ssl.CERT_NONE,
                 version=version)
@@ -360,7 +416,7 @@ class Configuration(object):
             return
 
         try:
-            tls = Tls(
+            tls = SharedContextTls(
                 ca_certs_file=ca_cert_file if ca_cert_file else None,
                 validate=ssl.CERT_REQUIRED if ssl_verify_server_cert else ssl.CERT_NONE,
                 version=version)
@@ -416,9 +472,7 @@ class Configuration(object):
         settings = self._read_default_configuration()
         self._add_buffered_configuration('default', settings)
 
-        for configuration_stanza in self.command.service.confs[str('ldap')].iter():
-            domain = configuration_stanza.name
-            settings = configuration_stanza.content
+        for domain, settings in iteritems(self._snapshot.get_stanzas()):
             self._add_buffered_configuration(domain, settings)
 
     def _read_configuration(self):
@@ -428,10 +482,8 @@ class Configuration(object):
         if command.domain == 'default':
             settings = self._read_default_configuration()
         else:
-            configuration_file = command.service.confs[str('ldap')]
-
             try:
-                stanza = configuration_file[command.domain]
+                settings = self._snapshot.get_stanza(command.domain)
             except KeyError as error:
                 self._read_all_configurations()
                 try:
@@ -441,30 +493,19 @@ class Configuration(object):
                     message = 'Cannot find the configuration stanza for domain={0} in ldap.conf.'.format(command.domain)
                     command.error_exit(error, message)
                     return
-            settings = stanza.content
         self._reset_fields(command.domain, settings)
         return
 
     def _read_default_configuration(self):
 
         command = self.command
-        service = command.service
-        namespace = service.namespace
 
         try:
-            response = service.get('properties/ldap/default', namespace.owner, namespace.app, namespace.sharing)
+            settings = self._snapshot.get_default_stanza()
         except HTTPError as error:
             command.error_exit(error, 'The default configuration stanza for ldap.conf is missing: ' + str(error))
             return
 
-        body = response.body.read()
-        feed = data.load(body)
-        entries = feed['feed'].get('entry', ())
-
-        if isinstance(entries, data.Record):
-            entries = entries,
-
-        settings = {entry['title']: entry['content'].get('$text', '') for entry in entries}
         return settings
 
     def _reset_fields(self, domain, settings):
@@ -481,8 +522,6 @@ class Configuration(object):
 
         binddn = self._get_value(settings, 'binddn')
 
-        storage_passwords = command.service.storage_passwords
-
         if domain == 'default':
             storage_password_names = 'SA-ldapsearch:default:',
         else:
@@ -491,18 +530,11 @@ class Configuration(object):
 
         password = None
 
-        for ssl_version in storage_password_names:
-            try:
-                storage_password = storage_passwords[ssl_version]
-                password = storage_password.clear_password
-                break
-            except HTTPError as e:
-                if e.status != 403:
-                    raise
-                command.logger.debug('Storage password "%s" access denied: %s', ssl_version, e)
+        for storage_password_name in storage_password_names:
+            password = self._snapshot.get_storage_password(storage_password_name)
+            if password is not None:
                 break
-            except KeyError as e:
-                command.logger.debug('Storage password "%s" not found', ssl_version)
+            command.logger.debug('Storage password "%s" not found', storage_password_name)
 
         if password is None:
             password = self._get_value(settings, 'password', default='')
@@ -512,6 +544,12 @@ class Configuration(object):
 
         self.decode = self._get_value(settings, 'decode', default=True, validate=Boolean())
         self.paged_size = int(self._get_value(settings, 'paged_size', default=1000, validate=Integer(1, 65535)))
+        self.schema_cache = self._get_value(settings, 'schema_cache', default=True, validate=Boolean())
+        self.server_strategy = self._get_value(
+            settings, 'server_strategy', default='first', validate=Set(*Configuration.server_strategies))
+        self.cache_ttl = self._get_value(settings, 'cache_ttl', default=0, validate=Integer(0))
+        self.pipeline = self._get_value(settings, 'pipeline', default=0, validate=Integer(0, 100))
+        self.concurrency = self._get_value(settings, 'concurrency', default=0, validate=Integer(0, 16))
 
         for option in itervalues(command.options):  # override settings with command option values, if they're present
             if not option.is_set:
@@ -519,16 +557,14 @@ class Configuration(object):
                     if hasattr(self, option.name):
                         option.value = getattr(self, option.name)
 
-        decode = command.decode if hasattr(command, 'decode') else self.decode
-        formatter = app.formatting_extensions if decode else None
-        tls = self._get_tls() if use_ssl else None
+        # Servers are created from these settings when they are first needed; see Configuration.server
 
-        def create_server(hostname):
-            return Server(
-                hostname, int(port), use_ssl, formatter=formatter, get_info=ALL,
-                allowed_referral_hosts=[('*', True)], tls=tls)
+        decode = command.decode if hasattr(command, 'decode') else self.decode
 
-        self.server = create_server(host[0]) if len(host) == 1 else [create_server(h) for h in host]
+        self.server_settings = Configuration.ServerSettings(
+            self.domain, tuple(host), int(port), bool(use_ssl), bool(decode), bool(self.schema_cache),
+            self.server_strategy)
+        self._server = None
         self.credentials = Configuration.Credentials(None, binddn, password, None)
 
         command.logger.debug('Configuration = %s', self)
@@ -0,0 +1,176 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from collections import OrderedDict
+from threading import RLock
+
+from splunklib.binding import HTTPError
+from splunklib.client import ConfigurationFile, PATH_CONF
+from splunklib import data
+
+
+class ConfigurationSnapshot(object):
+    """ Reads the ldap.conf stanzas, storage passwords, and sslConfig settings of the app in bulk.
+
+    Reading a configuration stanza or storage password one name at a time costs a splunkd round trip per name and
+    commands like ldapfetch, ldapfilter, and ldapgroup select the configuration of every domain they encounter. A
+    snapshot reads all ldap.conf stanzas with one request, all SA-ldapsearch storage passwords with another, and the
+    sslConfig stanza of ssl.conf and server.conf with one request each. Each is read the first time it is needed and
+    kept for the lifetime of the snapshot. Snapshots are shared by all commands in a process that use the same splunkd
+    session and app.
+
+    Snapshots are not saved to disk: ldap.conf may be layered across system, app, and user directories and storage
+    passwords must not be written in the clear.
+
+    """
+    ldap_setting_names = (
+        'alternatedomain', 'basedn', 'binddn', 'cache_ttl', 'concurrency', 'decode', 'paged_size', 'password',
+        'pipeline', 'port', 'schema_cache', 'server', 'server_strategy', 'ssl')
+
+    storage_password_realm = 'SA-ldapsearch'
+
+    def __init__(self, service, logger):
+        self.service = service
+        self.logger = logger
+        self._default_stanza = None
+        self._stanzas = None
+        self._storage_passwords = None
+        self._ssl_settings = {}
+        self._lock = RLock()
+
+    def get_default_stanza(self):
+        """ Gets the settings of the default ldap.conf stanza.
+
+        :return: A dictionary of setting values.
+        :raises HTTPError: The default stanza cannot be read.
+
+        """
+        with self._lock:
+            if self._default_stanza is None:
+                self._default_stanza = self._read_default_stanza()
+            return self._default_stanza
+
+    def get_stanzas(self):
+        """ Gets the settings of all ldap.conf stanzas but the default stanza.
+
+        :return: An ordered dictionary mapping stanza names to dictionaries of setting values.
+
+        """
+        with self._lock:
+            if self._stanzas is None:
+                self._stanzas = self._read_stanzas()
+            return self._stanzas
+
+    def get_stanza(self, name):
+        """ Gets the settings of an ldap.conf stanza.
+
+        :param name: Stanza name.
+        :return: A dictionary of setting values.
+        :raises KeyError: There is no stanza named :paramref:`name`.
+
+        """
+        return self.get_default_stanza() if name == 'default' else self.get_stanzas()[name]
+
+    def get_storage_password(self, name):
+        """ Gets the clear text of an SA-ldapsearch storage password.
+
+        :param name: Storage password name of the form `SA-ldapsearch:<username>:`.
+        :return: The clear text password or :const:`None`, if there is no password named :paramref:`name` or storage
+            passwords cannot be read.
+
+        """
+        with self._lock:
+            if self._storage_passwords is None:
+                self._storage_passwords = self._read_storage_passwords()
+            return self._storage_passwords.get(name)
+
+    def get_ssl_settings(self, name):
+        """ Gets the settings of the sslConfig stanza of a configuration file.
+
+        :param name: Configuration file name; `ssl` or `server`.
+        :return: A dictionary of setting values.
+        :raises KeyError: There is no sslConfig stanza in :paramref:`name`.
+
+        """
+        with self._lock:
+            settings = self._ssl_settings.get(name)
+            if settings is None:
+                settings = self._ssl_settings[name] = self._read_ssl_settings(name)
+        if not settings:
+            raise KeyError('sslConfig')
+        return settings
+
+    # region Privates
+
+    def _read_default_stanza(self):
+
+        service = self.service
+        namespace = service.namespace
+
+        response = service.get('properties/ldap/default', namespace.owner, namespace.app, namespace.sharing)
+        feed = data.load(response.body.read())
+        entries = feed['feed'].get('entry', ())
+
+        if isinstance(entries, data.Record):
+            entries = entries,
+
+        return {entry['title']: entry['content'].get('$text', '') for entry in entries}
+
+    def _read_stanzas(self):
+        # The SDK requests all entries of a collection when no count is given
+        stanzas = ConfigurationSnapshot._get_configuration_file(self.service, 'ldap').list(
+            f=list(ConfigurationSnapshot.ldap_setting_names))
+        return OrderedDict((stanza.name, stanza.content) for stanza in stanzas)
+
+    def _read_ssl_settings(self, name):
+        try:
+            stanza = ConfigurationSnapshot._get_configuration_file(self.service, name)['sslConfig']
+        except KeyError:
+            return {}
+        return stanza.content
+
+    @staticmethod
+    def _get_configuration_file(service, name):
+        # Unlike service.confs[name] this does not first request properties/<name> to check that the file exists
+        return ConfigurationFile(service, PATH_CONF % name, state={'title': name})
+
+    def _read_storage_passwords(self):
+
+        prefix = ConfigurationSnapshot.storage_password_realm + ':'
+
+        try:
+            storage_passwords = self.service.storage_passwords.list(
+                search='realm=' + ConfigurationSnapshot.storage_password_realm)
+        except HTTPError as error:
+            if error.status != 403:
+                raise
+            self.logger.debug('Storage passwords access denied: %s', error)
+            return {}
+
+        return {
+            storage_password.name: storage_password.clear_password
+            for storage_password in storage_passwords if storage_password.name.startswith(prefix)}
+
+    # endregion
+
+
+_snapshots = {}  # (splunkd authority, app, session token) -> ConfigurationSnapshot
+_snapshots_lock = RLock()
+
+
+def get_configuration_snapshot(service, logger):
+    """ Gets the :class:`ConfigurationSnapshot` for a splunkd session, which is shared by all commands in a process.
+
+    :param splunklib.client.Service service: Service used to read configuration.
+    :param logger: Logger for the commands using the snapshot.
+    :return: A :class:`ConfigurationSnapshot`.
+
+    """
+    key = service.authority, service.namespace.app, service.token
+    with _snapshots_lock:
+        snapshot = _snapshots.get(key)
+        if snapshot is None:
+            snapshot = _snapshots[key] = ConfigurationSnapshot(service, logger)
+    return snapshot
@@ -4,12 +4,16 @@
 
 from __future__ import absolute_import, division, print_function, unicode_literals
 
-from collections import OrderedDict
+from collections import deque, OrderedDict
+from itertools import chain
+from multiprocessing.pool import ThreadPool
 
 import app
 import ldap3
+from splunklib.searchcommands import SearchMetric
 from .six import itervalues
 from .six.moves import filter
+from .six.moves.queue import Queue
 
 
 class ConnectionPool(object):
@@ -20,18 +24,73 @@ class ConnectionPool(object):
     :py:meth:`~ConnectionPool.select` a domain to query for each input event record they process. Connections are
     instantiated and opened on first use and closed on :py:meth:`~ConnectionPool.__exit__`.
 
+    Under search command protocol version 2 a streaming command is called once for each chunk of records it processes.
+    A pool may be entered once per chunk. Connections and normalized attribute names are retained across chunks and
+    closed on exit from the final chunk or when an exception is raised.
+
+    If the command's `cache_ttl` is greater than zero, the pool also opens an :class:`app.EntryCache` that commands may
+    use to share lookup results with other searches. Cache hits and misses are reported as search metrics.
+
+    Commands that pipeline their searches with an :class:`app.SearchPipeline` use
+    :py:meth:`~ConnectionPool.select_pipelined` to obtain a second, asynchronous connection to a domain. It is bound
+    with the same server and credentials as the synchronous connection returned by :py:meth:`~ConnectionPool.select`.
+
+    Commands that process records for many domains use :py:meth:`~ConnectionPool.fan_out` to search different domains
+    concurrently. Worker threads and the additional connections they use are retained across chunks like all others.
+
     """
+    max_workers = 16
+
     def __init__(self, configuration, attributes):
         self.configuration = configuration
         self.connections = OrderedDict()
+        self.pipelined_connections = OrderedDict()
+        self.concurrent_connections = OrderedDict()
+        self.idle_connections = {}
+        self.basedns = OrderedDict()
         self.attributes = attributes
+        self.entry_cache = None
+        self.thread_pool = None
+        self.is_open = False
 
     def __enter__(self):
-        self.attributes = app.get_normalized_attribute_names(self.attributes, self.select('default'), self.configuration)
+        if not self.is_open:
+            self.attributes = app.get_normalized_attribute_names(
+                self.attributes, self.select('default'), self.configuration)
+            cache_ttl = getattr(self.configuration.command, 'cache_ttl', None)
+            if cache_ttl:
+                self.entry_cache = app.EntryCache(
+                    app.get_cache_path('entries.db'), cache_ttl, self.configuration.command.logger)
+            self.is_open = True
         return self
 
     def __exit__(self, exception_type, exception, traceback):
-        for connection in filter(None, itervalues(self.connections)):
+        command = self.configuration.command
+        entry_cache = self.entry_cache
+
+        if entry_cache is not None:
+            entry_cache.flush()
+            command.write_metric('entry_cache.hits', SearchMetric(None, entry_cache.hits, None, None))
+            command.write_metric('entry_cache.misses', SearchMetric(None, entry_cache.misses, None, None))
+
+        if exception_type is None and command.protocol_version == 2 and not command._finished:
+            return True  # more chunks are coming: keep our connections open
+
+        self.close()
+        command.logger.debug('Re-raise exception type: %s', exception_type)
+        return exception_type is None  # meaning: do not swallow, but re-raise any exception presented by the runtime
+
+    def close(self):
+        if self.thread_pool is not None:
+            self.thread_pool.terminate()
+            self.thread_pool = None
+
+        connections = chain(
+            chain.from_iterable(itervalues(self.concurrent_connections)),
+            itervalues(self.pipelined_connections),
+            itervalues(self.connections))
+
+        for connection in filter(None, connections):
             try:
                 connection.unbind()
             except Exception as error:
@@ -43,8 +102,80 @@ class ConnectionPool(object):
                 self.configuration.command.logger.debug('Swallowed exception of type %s: %s', type(error), error)
                 pass
 
-        self.configuration.command.logger.debug('Re-raise exception type: %s', exception_type)
-        return exception_type is None  # meaning: do not swallow, but re-raise any exception presented by the runtime
+        if self.entry_cache is not None:
+            self.entry_cache.close()
+            self.entry_cache = None
+
+        self.connections.clear()
+        self.pipelined_connections.clear()
+        self.concurrent_connections.clear()
+        self.idle_connections.clear()
+        self.basedns.clear()
+        self.is_open = False
+        return
+
+    def fan_out(self, function, requests, concurrency):
+        """ Calls a function for each of a stream of requests on worker threads, concurrently for different domains.
+
+        Each call is given a connection of its own to the domain of its request. Up to :paramref:`concurrency`
+        connections are opened to each domain and no more than :py:attr:`ConnectionPool.max_workers` requests are in
+        process at any one time. Connections are opened on the calling thread, because
+        :py:meth:`app.Configuration.select` is not thread safe.
+
+        :param function: A function of two arguments, `connection` and `argument`, that is called on a worker thread.
+            The value of `connection` is :const:`None`, if the domain of a request is :const:`None` or not configured.
+        :param requests: An iterable of `(domain, argument)` tuples.
+        :param concurrency: The maximum number of requests for a single domain that may be in process at once.
+        :return: An iterable stream of the values returned by :paramref:`function` in the order of
+            :paramref:`requests`.
+
+        """
+        if self.thread_pool is None:
+            self.thread_pool = ThreadPool(self.max_workers)
+
+        in_process = {}
+        pending = deque()
+
+        for domain, argument in requests:
+
+            connection = None if domain is None else self.select(domain)
+
+            if connection is None:
+                domain = None
+            else:
+                while in_process.get(domain, 0) >= concurrency:
+                    yield self._get_result(pending, in_process)
+                in_process[domain] = in_process.get(domain, 0) + 1
+
+            while len(pending) >= self.max_workers:
+                yield self._get_result(pending, in_process)
+
+            if domain is None:
+                pending.append((None, self.thread_pool.apply_async(function, (None, argument))))
+                continue
+
+            # Open enough connections that each request for this domain in process is certain to get one
+
+            idle_connections = self.idle_connections.get(domain)
+
+            if idle_connections is None:
+                self.idle_connections[domain] = idle_connections = Queue()
+                idle_connections.put(connection)
+
+            connections = self.concurrent_connections.setdefault(domain, [])
+
+            while 1 + len(connections) < in_process[domain]:
+                concurrent_connection = self._clone(connection)
+                connections.append(concurrent_connection)
+                idle_connections.put(concurrent_connection)
+
+            pending.append((domain, self.thread_pool.apply_async(
+                ConnectionPool._call, (function, idle_connections, argument))))
+
+        while pending:
+            yield self._get_result(pending, in_process)
+
+        return
 
     def select(self, domain):
 
@@ -67,5 +198,55 @@ class ConnectionPool(object):
 
                 connection.bind()
                 self.connections[domain] = connection
+                self.basedns[domain] = configuration.basedn
 
         return connection
+
+    def select_pipelined(self, domain):
+
+        connection = self.pipelined_connections.get(domain)
+
+        if connection is None:
+
+            synchronous_connection = self.select(domain)
+
+            if synchronous_connection is None:
+                self.pipelined_connections[domain] = None
+            else:
+                connection = self._clone(synchronous_connection, client_strategy=ldap3.ASYNC)
+                self.pipelined_connections[domain] = connection
+
+        return connection
+
+    # region Privates
+
+    @staticmethod
+    def _call(function, idle_connections, argument):
+        connection = idle_connections.get()
+        try:
+            return function(connection, argument)
+        finally:
+            idle_connections.put(connection)
+
+    @staticmethod
+    def _clone(connection, **kwargs):
+        # The server's DSA info and schema were read when the original connection was bound
+        clone = ldap3.Connection(
+            connection.server,
+            read_only=True,
+            raise_exceptions=True,
+            user=connection.user,
+            password=connection.password,
+            **kwargs)
+
+        clone.bind(read_server_info=False)
+        return clone
+
+    @staticmethod
+    def _get_result(pending, in_process):
+        domain, result = pending.popleft()
+        if domain is not None:
+            in_process[domain] -= 1
+        return result.get()
+
+    # endregion
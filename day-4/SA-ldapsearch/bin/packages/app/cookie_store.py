@@ -0,0 +1,99 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from hashlib import sha1
+from tempfile import NamedTemporaryFile
+import io
+import os
+
+from .six import text_type
+
+
+class CookieStore(object):
+    """ Persists the Active Directory DirSync cookies of incremental ldapsearch commands between invocations.
+
+    A DirSync cookie records the point up to which a client has synchronized the entries matching a search. Presenting
+    it on the next search returns only the entries that changed since. Cookies are valid only for the search that
+    produced them. Hence each cookie is stored in a file named by a digest of the domain, search base, search filter,
+    and attribute list of its search.
+
+    A cookie is saved only after all of the entries returned with it have been written. If a search is interrupted the
+    next search starts from the previous cookie and no change is lost.
+
+    """
+    version = 1
+
+    def __init__(self, directory, logger):
+        self.directory = directory
+        self.logger = logger
+
+    def load(self, *key):
+        """ Loads the cookie saved for a search.
+
+        :param key: Components of the key identifying a search; typically its domain, search base, search filter, and
+            attribute list.
+        :return: The cookie saved for :paramref:`key` or :const:`None`, if there is no such cookie.
+
+        """
+        path = self._get_path(key)
+
+        try:
+            with io.open(path, 'rb') as source:
+                cookie = source.read()
+        except (IOError, OSError) as error:
+            self.logger.debug('No DirSync cookie at %s: %s', path, error)
+            return None
+
+        return cookie if cookie else None
+
+    def remove(self, *key):
+        """ Removes the cookie saved for a search, if there is one.
+
+        :param key: Components of the key identifying a search.
+        :return: :const:`None`.
+
+        """
+        path = self._get_path(key)
+
+        try:
+            os.remove(path)
+        except (IOError, OSError) as error:
+            self.logger.debug('Failed to remove DirSync cookie %s: %s', path, error)
+
+        return
+
+    def save(self, cookie, *key):
+        """ Saves the cookie for a search, replacing any cookie saved earlier.
+
+        :param bytes cookie: The cookie returned by the final response to a DirSync search.
+        :param key: Components of the key identifying a search.
+        :return: :const:`None`.
+
+        """
+        path = self._get_path(key)
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Write to a temporary file and then rename it so that concurrent searches never read a partial cookie
+            prefix = '.' + os.path.basename(path)
+            with NamedTemporaryFile('wb', dir=self.directory, prefix=prefix, delete=False) as target:
+                target.write(cookie)
+            replace = getattr(os, 'replace', os.rename)
+            replace(target.name, path)
+        except (IOError, OSError) as error:
+            self.logger.warning('Failed to save DirSync cookie to %s: %s', path, error)
+            return
+
+        self.logger.debug('Saved DirSync cookie to %s', path)
+        return
+
+    # region Privates
+
+    def _get_path(self, key):
+        digest = sha1('\0'.join(text_type(value) for value in (CookieStore.version,) + key).encode('utf-8'))
+        return os.path.join(self.directory, digest.hexdigest() + '.cookie')
+
+    # endregion
@@ -0,0 +1,198 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from base64 import b64encode
+from hashlib import sha1
+from json import JSONEncoder, loads
+from threading import Lock
+from time import time
+import os
+import sqlite3
+
+from .six import binary_type, text_type
+
+
+class EntryCache(object):
+    """ Caches directory entries retrieved by the ldapfetch, ldapfilter, and ldapgroup commands.
+
+    Entries are stored in an SQLite database so that they are shared by all commands running on a search head and
+    survive from one search to the next. Each entry expires `ttl` seconds after it was stored. When the cache holds
+    more than :py:attr:`EntryCache.capacity` entries, the least recently used entries are evicted on
+    :py:meth:`EntryCache.close`.
+
+    Values must be JSON serializable with one exception: binary values are Base-64 encoded and all other values that
+    JSON does not support are converted to text. These are the same conversions the commands apply to values before
+    they write them.
+
+    An entry cache may be shared by the worker threads of :py:meth:`app.ConnectionPool.fan_out`. Access to the database
+    is serialized by a lock.
+
+    The cache never fails a search. If the database cannot be opened or updated a warning is logged and the cache is
+    disabled for the remainder of the command invocation.
+
+    """
+    capacity = 100000
+
+    def __init__(self, path, ttl, logger):
+        self.path = path
+        self.ttl = ttl
+        self.logger = logger
+        self.hits = 0
+        self.misses = 0
+        self._accessed = set()
+        self._connection = None
+        self._lock = Lock()
+        self._encoder = JSONEncoder(ensure_ascii=False, separators=(',', ':'), default=EntryCache._encode_value)
+
+        try:
+            directory = os.path.dirname(path)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            connection = sqlite3.connect(path, timeout=10.0, isolation_level=None, check_same_thread=False)
+            connection.execute('PRAGMA journal_mode=WAL')
+            connection.execute('PRAGMA synchronous=NORMAL')
+            connection.execute(
+                'CREATE TABLE IF NOT EXISTS entries ('
+                'key TEXT PRIMARY KEY, value TEXT NOT NULL, expires REAL NOT NULL, accessed REAL NOT NULL)')
+        except (OSError, sqlite3.Error) as error:
+            self._disable(error)
+        else:
+            self._connection = connection
+
+    def get(self, *key):
+        """ Gets the unexpired value stored under :paramref:`key`.
+
+        :param key: Components of the key identifying a value; typically a kind of lookup, a domain, and the names and
+            arguments that determine the result of the lookup.
+        :return: The value stored under :paramref:`key` or :const:`None`, if there is no such value or it has expired.
+
+        """
+        key = EntryCache._hash(key)
+
+        with self._lock:
+
+            if self._connection is None:
+                return None
+
+            try:
+                row = self._connection.execute(
+                    'SELECT value FROM entries WHERE key = ? AND expires > ?', (key, time())).fetchone()
+            except sqlite3.Error as error:
+                self._disable(error)
+                return None
+
+            if row is None:
+                self.misses += 1
+                return None
+
+            self.hits += 1
+            self._accessed.add(key)
+
+        return loads(row[0])
+
+    def set(self, value, *key):
+        """ Stores :paramref:`value` under :paramref:`key`.
+
+        :param value: Value to store.
+        :param key: Components of the key identifying :paramref:`value`.
+        :return: :const:`None`.
+
+        """
+        if self._connection is None:
+            return
+
+        key, value = EntryCache._hash(key), self._encoder.encode(value)
+
+        with self._lock:
+
+            if self._connection is None:
+                return
+
+            now = time()
+
+            try:
+                self._connection.execute(
+                    'INSERT OR REPLACE INTO entries (key, value, expires, accessed) VALUES (?, ?, ?, ?)',
+                    (key, value, now + self.ttl, now))
+            except sqlite3.Error as error:
+                self._disable(error)
+
+        return
+
+    def flush(self):
+        """ Records the time at which the entries read since the last flush were accessed.
+
+        :return: :const:`None`.
+
+        """
+        with self._lock:
+
+            if self._connection is None or not self._accessed:
+                return
+
+            now = time()
+
+            try:
+                with self._connection:
+                    self._connection.execute('BEGIN')
+                    self._connection.executemany(
+                        'UPDATE entries SET accessed = ? WHERE key = ?', ((now, key) for key in self._accessed))
+            except sqlite3.Error as error:
+                self._disable(error)
+
+            self._accessed.clear()
+
+        return
+
+    def close(self):
+        """ Flushes access times, evicts expired and least recently used entries, and closes the database.
+
+        :return: :const:`None`.
+
+        """
+        self.flush()
+
+        if self._connection is None:
+            return
+
+        try:
+            with self._connection:
+                self._connection.execute('BEGIN')
+                self._connection.execute('DELETE FROM entries WHERE expires <= ?', (time(),))
+                count = self._connection.execute('SELECT COUNT(*) FROM entries').fetchone()[0]
+                if count > self.capacity:
+                    self._connection.execute(
+                        'DELETE FROM entries WHERE key IN (SELECT key FROM entries ORDER BY accessed LIMIT ?)',
+                        (count - self.capacity,))
+        except sqlite3.Error as error:
+            self.logger.warning('Failed to evict entries from %s: %s', self.path, error)
+
+        self._connection.close()
+        self._connection = None
+        return
+
+    # region Privates
+
+    def _disable(self, error):
+        self.logger.warning('Entry cache %s is disabled: %s', self.path, error)
+        if self._connection is not None:
+            try:
+                self._connection.close()
+            except sqlite3.Error:
+                pass
+            self._connection = None
+        return
+
+    @staticmethod
+    def _encode_value(value):
+        if isinstance(value, binary_type):
+            return b64encode(value).decode('utf-8')
+        return text_type(value)
+
+    @staticmethod
+    def _hash(key):
+        return sha1(JSONEncoder(ensure_ascii=False, default=text_type).encode(key).encode('utf-8')).hexdigest()
+
+    # endregion
@@ -3,73 +3,161 @@
 # Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
 
 from __future__ import absolute_import, division, print_function, unicode_literals
+from collections import OrderedDict
 import re
 import string
-import types
-from .six import integer_types, text_type, PY2, PY3, u
-from .six.moves import UserDict
-
-
-
+from .lru_cache import LruCache
+from .six import integer_types, text_type, u
+from .six.moves import map, UserDict
 
 
 class ExpandedString(object):
     """ Performs field value expansion on a string based on the contents of a record
 
+    A string is compiled once into a template: a list of literal text and replacement field segments. Templates are
+    shared by all instances created from the same string and converter, so that commands may instantiate an
+    ExpandedString per record without parsing the string again. Each template remembers the expansions of the most
+    recent combinations of field values. Events processed by commands like ldapfilter repeat the same users, hosts, and
+    domains; these expand without formatting or converting a field value.
+
+    Instances and templates may be shared by the worker threads of :py:meth:`app.ConnectionPool.fan_out`.
+
     """
     class _Formatter(string.Formatter):
         def get_value(self, key, args, kwargs):
             value = args[key] if isinstance(key, integer_types) else kwargs.get(key, u'')
             return value
 
-    Formatter = _Formatter()
-    CurlyBraces = re.compile(r'([{}])')
-    ReplacementFields = re.compile(r'((?:\$\$)*)\$(([^$]+(?:\$\$)*)+)\$')
+    class _Template(object):
 
-    def __init__(self, value, converter=None):
+        def __init__(self, value, converter):
+
+            format_spec = re.sub(ExpandedString.CurlyBraces, r'\1\1', value)
+            format_spec, field_count = re.subn(ExpandedString.ReplacementFields, r'\1{\2}', format_spec)
+
+            self.converter = converter
+            self.expansions = LruCache(ExpandedString.cache_size)
+
+            if field_count == 0:
+                self.value, self.segments, self.field_names = value, None, None
+                return
+
+            self.value = format_spec
+            self.segments = segments = list(ExpandedString.Formatter.parse(format_spec))
+
+            if any(name is not None and not ExpandedString.SimpleFieldName.match(name) or spec and '{' in spec
+                    for _, name, spec, _ in segments):
+                # Field names with attribute or index expressions and nested replacement fields are left to the
+                # formatter
+                self.field_names = None
+                return
+
+            self.field_names = tuple(OrderedDict.fromkeys(
+                field_name for _, field_name, _, _ in segments if field_name is not None))
+
+        def expand(self, record):
+
+            field_names = self.field_names
+
+            if field_names is None:
+                return self.value if self.segments is None else self._format(record)
 
-        format_spec = re.sub(ExpandedString.CurlyBraces, r'\1\1', value)
-        format_spec, field_count = re.subn(ExpandedString.ReplacementFields, r'\1{\2}', format_spec)
+            missing = ExpandedString._missing
+            values = tuple([record.get(field_name, missing) for field_name in field_names])
+            key = values, tuple(map(type, values))  # values of different types may compare equal; as do 1 and True
+            expansions = self.expansions
 
-        if field_count == 0:
+            try:
+                text = expansions.get(key, missing)
+            except TypeError:
+                return self._expand(values)  # a field value is unhashable; typically a multivalue
 
-            def get_value(self, record):
-                return self._value
+            if text is missing:
+                text = self._expand(values)
+                expansions.set(key, text)
 
-            self.get_value = types.MethodType(get_value, self)
-            self._value = value
+            return text
 
-        elif converter is None:
+        def _expand(self, values):
 
-            def get_value(self, record):
-                text = ExpandedString.Formatter.vformat(self._value, tuple(), record)
-                return text if len(text) > 0 else None
+            formatter = ExpandedString.Formatter
+            converter = self.converter
+            missing = ExpandedString._missing
+            values = dict(zip(self.field_names, values))
+            parts = []
 
-            self.get_value = types.MethodType(get_value, self)
-            self._value = format_spec
+            for literal_text, field_name, format_spec, conversion in self.segments:
+                if literal_text:
+                    parts.append(literal_text)
+                if field_name is None:
+                    continue
+                value = values[field_name]
+                if value is missing:
+                    value = u''
+                elif converter is not None:
+                    value = converter(text_type(value))
+                if conversion:
+                    value = formatter.convert_field(value, conversion)
+                parts.append(formatter.format_field(value, format_spec))
 
-        else:
+            text = u''.join(parts)
+            return text if len(text) > 0 else None
 
-            class FieldConverter(UserDict):
-                def __getitem__(self, key):
-                    text = converter(text_type(self.data[key]))
-                    return text
+        def _format(self, record):
+
+            converter = self.converter
+
+            if converter is not None:
+
+                class FieldConverter(UserDict):
+                    def __getitem__(self, key):
+                        text = converter(text_type(self.data[key]))
+                        return text
 
-            def get_value(self, record):
                 field_converter = FieldConverter()
                 field_converter.data = record
-                text = ExpandedString.Formatter.vformat(self._value, tuple(), field_converter)
-                return text if len(text) > 0 else None
+                record = field_converter
+
+            text = ExpandedString.Formatter.vformat(self.value, tuple(), record)
+            return text if len(text) > 0 else None
+
+    Formatter = _Formatter()
+    CurlyBraces = re.compile(r'([{}])')
+    ReplacementFields = re.compile(r'((?:\$\$)*)\$(([^$]+(?:\$\$)*)+)\$')
+    SimpleFieldName = re.compile(r'^[^.\[\]{}]+$')
+
+    cache_size = 1024  # number of expansions remembered by each template
+    template_cache_size = 256
 
-            self.get_value = types.MethodType(get_value, self)
+    _missing = object()
+    _templates = LruCache(template_cache_size)
 
-            if PY2:
-                self._value = format_spec.encode('utf-8')
-            elif PY3:
-                self._value = format_spec
-            
+    def __init__(self, value, converter=None):
+        self._template = ExpandedString._get_template(value, converter)
         return
 
     def get_value(self, record):
-        # We monkey patch this method in the constructor based on whether field_count is zero or non-zero
-        return NotImplemented
+        """ Expands the replacement fields of this string with the values of a record.
+
+        :param record: A dictionary of field values.
+        :return: The expanded string or :const:`None`, if this string has replacement fields and expands to an empty
+            string.
+
+        """
+        return self._template.expand(record)
+
+    # region Privates
+
+    @staticmethod
+    def _get_template(value, converter):
+
+        key = value, converter
+        template = ExpandedString._templates.get(key)
+
+        if template is None:
+            template = ExpandedString._Template(value, converter)
+            ExpandedString._templates.set(key, template)
+
+        return template
+
+    # endregion
@@ -7,6 +7,7 @@ from __future__ import absolute_import, division, print_function, unicode_litera
 import itertools
 import struct
 
+from .lru_cache import LruCache
 from .six import text_type, PY3
 from .six.moves import range, map
 
@@ -199,6 +200,37 @@ _well_known_sid_strings = {
 }
 
 
+_ace_flags_strings = tuple(''.join((
+    'CI' if ace_flags & 0x02 else '',  # CONTAINER_INHERIT_ACE => SDDL_CONTAINER_INHERIT
+    'OI' if ace_flags & 0x01 else '',  # OBJECT_INHERIT_ACE => SDDL_OBJECT_INHERIT
+    'NP' if ace_flags & 0x04 else '',  # NO_PROPAGATE_INHERIT_ACE => SDDL_NO_PROPAGATE
+    'IO' if ace_flags & 0x08 else '',  # INHERIT_ONLY_ACE => SDDL_INHERIT_ONLY
+    'ID' if ace_flags & 0x10 else '',  # INHERITED_ACE => SDDL_INHERITED
+    'SA' if ace_flags & 0x40 else '',  # SUCCESSFUL_ACCESS_ACE_FLAG => SDDL_AUDIT_SUCCESS
+    'FA' if ace_flags & 0x80 else '',  # FAILED_ACCESS_ACE_FLAG => SDDL_AUDIT_FAILURE
+)) for ace_flags in range(0x100))
+
+# Structures are unpacked with precompiled formats
+
+_acl_header = struct.Struct(b'HH')
+_ace_header = struct.Struct(b'BBHI')
+_guid = struct.Struct(b'I2H8B')
+_sid_header = struct.Struct(b'BB')
+_sid_identifier_authority = struct.Struct(b'>3H')
+_sid_sub_authorities = tuple(struct.Struct(str(count) + 'I') for count in range(0x100))
+_uint16 = struct.Struct(b'H')
+_uint32 = struct.Struct(b'I')
+_uint32_pair = struct.Struct(b'II')
+
+# The same SIDs and GUIDs recur in the security descriptors and SID-valued attributes of most entries in a directory and
+# most entries in an organizational unit share a security descriptor. Their string forms are cached by binary value.
+
+_guid_strings = LruCache(4096)
+_security_descriptor_strings = LruCache(256)
+_sid_strings = LruCache(4096)
+_well_known_sid_strings_cache = LruCache(4096)
+
+
 def format_acl(value, offset):
     """
     :param value:
@@ -206,26 +238,17 @@ def format_acl(value, offset):
     :return:
 
     """
-    acl_start = struct.unpack_from(b'I', value, offset)[0]
-    acl_size, ace_count = struct.unpack_from(b'HH', value, acl_start + 2)
+    acl_start = _uint32.unpack_from(value, offset)[0]
+    acl_size, ace_count = _acl_header.unpack_from(value, acl_start + 2)
     ace_start = acl_start + 8
 
-    text = ''
+    text = []
 
     for i in range(0, ace_count):
 
-        ace_type, ace_flags, ace_size, rights = struct.unpack_from(b'BBHI', value, ace_start)
+        ace_type, ace_flags, ace_size, rights = _ace_header.unpack_from(value, ace_start)
         ace_type_string = _ace_type_strings[ace_type]
-
-        ace_flags_string = ''.join((
-            'CI' if ace_flags & 0x02 else '',  # CONTAINER_INHERIT_ACE => SDDL_CONTAINER_INHERIT
-            'OI' if ace_flags & 0x01 else '',  # OBJECT_INHERIT_ACE => SDDL_OBJECT_INHERIT
-            'NP' if ace_flags & 0x04 else '',  # NO_PROPAGATE_INHERIT_ACE => SDDL_NO_PROPAGATE
-            'IO' if ace_flags & 0x08 else '',  # INHERIT_ONLY_ACE => SDDL_INHERIT_ONLY
-            'ID' if ace_flags & 0x10 else '',  # INHERITED_ACE => SDDL_INHERITED
-            'SA' if ace_flags & 0x40 else '',  # SUCCESSFUL_ACCESS_ACE_FLAG => SDDL_AUDIT_SUCCESS
-            'FA' if ace_flags & 0x80 else '',  # FAILED_ACCESS_ACE_FLAG => SDDL_AUDIT_FAILURE
-        ))
+        ace_flags_string = _ace_flags_strings[ace_flags]
 
         offset = ace_start + 8
 
@@ -302,7 +325,7 @@ def format_acl(value, offset):
                 claim_values = ()
                 claim_type = ''
 
-            text += '(' + ';'.join(
+            text.append('(' + ';'.join(
                 (
                     ace_type_string,
                     ace_flags_string,
@@ -312,9 +335,9 @@ def format_acl(value, offset):
                     account_sid,
                     '(' + ','.join(
                         itertools.chain((claim_name, claim_type, text_type(claim_flags)), claim_values)) + ')'
-                )) + ')'
+                )) + ')')
         else:
-            text += '(' + ';'.join(
+            text.append('(' + ';'.join(
                 (
                     ace_type_string,
                     ace_flags_string,
@@ -322,11 +345,11 @@ def format_acl(value, offset):
                     object_guid,
                     inherit_object_guid,
                     account_sid
-                )) + ')'
+                )) + ')')
 
         ace_start += ace_size
 
-    return text
+    return ''.join(text)
 
 
 def format_attribute_syntax(value):
@@ -455,8 +478,14 @@ def format_guid(value, offset=0):
     :return unicode:
 
     """
-    value = struct.unpack_from(b'I2H8B', value, offset)
-    text = '{0:08x}-{1:04x}-{2:04x}-{3:02x}{4:02x}-{5:02x}{6:02x}{7:02x}{8:02x}{9:02x}{10:02x}'.format(*value)
+    key = value[offset:offset + 16]
+    text = _guid_strings.get(key)
+
+    if text is None:
+        text = '{0:08x}-{1:04x}-{2:04x}-{3:02x}{4:02x}-{5:02x}{6:02x}{7:02x}{8:02x}{9:02x}{10:02x}'.format(
+            *_guid.unpack_from(value, offset))
+        _guid_strings.set(key, text)
+
     return text
 
 
@@ -583,17 +612,36 @@ def format_sid(value, offset=0, rid_map=None):
 
     """
 
+    revision, sub_authority_count = _sid_header.unpack_from(value, offset)
+    sub_authority_count &= 0xFF  # upper nibble is reserved for future use
+
+    if rid_map is None:
+        cache = _sid_strings
+    elif rid_map is _well_known_sid_strings:
+        cache = _well_known_sid_strings_cache
+    else:
+        return _format_sid(value, offset, rid_map, revision, sub_authority_count)
+
+    key = value[offset:offset + 8 + 4 * sub_authority_count]
+    text = cache.get(key)
+
+    if text is None:
+        text = _format_sid(value, offset, rid_map, revision, sub_authority_count)
+        cache.set(key, text)
+
+    return text
+
+
+def _format_sid(value, offset, rid_map, revision, sub_authority_count):
+
     def unpack_identifier_authority():
-        triplet = struct.unpack_from(b'>3H', value, offset + 2)
+        triplet = _sid_identifier_authority.unpack_from(value, offset + 2)
         result = triplet[2] + (triplet[1] << 16) + (triplet[0] << 32)
         return result
 
-    revision, sub_authority_count = struct.unpack_from(b'BB', value, offset)
-    sub_authority_count &= 0xFF  # upper nibble is reserved for future use
-
     if rid_map is not None:
         rid_offset = offset + 8 + 4 * (sub_authority_count - 1)
-        rid = struct.unpack_from(b'I', value, rid_offset)[0]
+        rid = _uint32.unpack_from(value, rid_offset)[0]
         try:
             if rid == 0x00000000 and sub_authority_count == 1:
                 identifier_authority = unpack_identifier_authority()
@@ -610,7 +658,7 @@ def format_sid(value, offset=0, rid_map=None):
             pass
 
     identifier_authority = unpack_identifier_authority()
-    sub_authorities = struct.unpack_from(str(sub_authority_count) + 'I', value, offset + 8)
+    sub_authorities = _sid_sub_authorities[sub_authority_count].unpack_from(value, offset + 8)
 
     text = '-'.join(itertools.chain(
         (
@@ -619,7 +667,7 @@ def format_sid(value, offset=0, rid_map=None):
             text_type(identifier_authority) if identifier_authority < 0x100000000 else '{0:#014x}'.format(
                 identifier_authority)
         ),
-        map(lambda p: text_type(p), sub_authorities)))
+        map(text_type, sub_authorities)))
 
     return text
 
@@ -634,7 +682,18 @@ def format_security_descriptor(value):
     :return: String form of :paramref:`value`.
 
     """
-    start_owner, start_group = struct.unpack_from(b'II', value, 4)
+    text = _security_descriptor_strings.get(value)
+
+    if text is None:
+        text = _format_security_descriptor(value)
+        _security_descriptor_strings.set(value, text)
+
+    return text
+
+
+def _format_security_descriptor(value):
+
+    start_owner, start_group = _uint32_pair.unpack_from(value, 4)
     text = ''
 
     if start_owner:
@@ -643,7 +702,7 @@ def format_security_descriptor(value):
     if start_group:
         text += 'G:' + format_sid(value, start_group, _well_known_sid_strings)
 
-    control = struct.unpack_from(b'H', value, 2)[0]
+    control = _uint16.unpack_from(value, 2)[0]
 
     if control & 0x0004:  # SE_DACL_PRESENT
         text += 'D:'
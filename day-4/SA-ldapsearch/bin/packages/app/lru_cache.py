@@ -0,0 +1,52 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from collections import OrderedDict
+from threading import Lock
+
+
+class LruCache(object):
+    """ A bounded, thread-safe map that discards its least recently used item when it is full.
+
+    Caches may be shared by the worker threads of :py:meth:`app.ConnectionPool.fan_out`.
+
+    """
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._items = OrderedDict()
+        self._lock = Lock()
+
+    def get(self, key, default=None):
+        """ Gets the value of an item and marks it most recently used.
+
+        :param key: Item key.
+        :param default: Value to return, if there is no item with :paramref:`key`.
+        :return: The value of the item with :paramref:`key` or :paramref:`default`.
+        :raises TypeError: :paramref:`key` is not hashable.
+
+        """
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                return default
+            self._items[key] = value  # most recently used
+        return value
+
+    def set(self, key, value):
+        """ Sets the value of an item, marks it most recently used, and discards the least recently used item, if the
+        cache is full.
+
+        :param key: Item key.
+        :param value: Item value.
+        :return: :const:`None`.
+
+        """
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            if len(self._items) > self.capacity:
+                self._items.popitem(last=False)
+        return
@@ -0,0 +1,210 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from glob import glob
+from hashlib import sha1
+from tempfile import NamedTemporaryFile
+from time import time
+import io
+import os
+
+import ldap3
+from ldap3.protocol.rfc4512 import DsaInfo, SchemaInfo
+from ldap3.protocol.formatters.standard import format_attribute_values
+from .six import text_type, binary_type, iteritems
+
+
+class SchemaCache(object):
+    """ Persists the DSA info and schema of the directory servers for a domain between command invocations.
+
+    Downloading the schema of an Active Directory domain controller transfers thousands of attribute type and object
+    class definitions. This class saves the DSA info and schema read from a server to disk and--on subsequent
+    connections to the same server--revalidates the saved schema with a single base search for the `modifyTimestamp`
+    of the subschema subentry. The saved schema is loaded only when it is current. Otherwise it is downloaded and saved
+    again.
+
+    Cache files are named by a digest of the domain, server host and port, and--for schema files--the distinguished
+    name and `modifyTimestamp` of the subschema subentry. Hence a schema update on the server produces a new file name
+    and stale files are never loaded.
+
+    """
+    version = 1
+
+    def __init__(self, directory, domain, logger):
+        self.directory = directory
+        self.domain = domain
+        self.logger = logger
+
+    def load(self, server, connection):
+        """ Attaches the cached DSA info and schema to :paramref:`server`, if they are current.
+
+        :param ldap3.Server server: Server for which cached information should be loaded.
+        :param ldap3.Connection connection: An open connection to :paramref:`server` used to revalidate the cache.
+        :return: :const:`True`, if the cached DSA info and schema were attached to :paramref:`server`; otherwise, if
+            they are missing or out of date, :const:`False`.
+
+        """
+        server_key = self._get_server_key(server)
+        dsa_info_path = os.path.join(self.directory, server_key + '.dsa.json')
+
+        try:
+            with io.open(dsa_info_path, 'r', encoding='utf-8') as target:
+                dsa_info = DsaInfo.from_file(target)
+        except (IOError, OSError, ValueError, ldap3.core.exceptions.LDAPException) as error:
+            self.logger.debug('Schema cache miss for %s: %s', server.name, error)
+            return False
+
+        schema_entry = SchemaCache._get_first_value(dsa_info.schema_entry)
+
+        if not schema_entry:
+            return False
+
+        modify_time_stamp = self._read_modify_time_stamp(connection, schema_entry)
+
+        if modify_time_stamp is None:
+            return False
+
+        schema_info_path = os.path.join(
+            self.directory, server_key + '.' + self._get_schema_key(schema_entry, modify_time_stamp) + '.schema.json')
+
+        try:
+            with io.open(schema_info_path, 'r', encoding='utf-8') as target:
+                schema_info = SchemaInfo.from_file(target)
+        except (IOError, OSError, ValueError, ldap3.core.exceptions.LDAPException) as error:
+            self.logger.debug('Schema cache miss for %s: %s', server.name, error)
+            return False
+
+        # Format the "other" attributes just as ldap3.Server does when it reads its schema from the server
+
+        for attribute in schema_info.other:
+            schema_info.other[attribute] = format_attribute_values(
+                schema_info, attribute, schema_info.raw[attribute], server.custom_formatter)
+
+        for attribute in dsa_info.other:
+            dsa_info.other[attribute] = format_attribute_values(
+                schema_info, attribute, dsa_info.raw[attribute], server.custom_formatter)
+
+        server.attach_dsa_info(dsa_info)
+        server.attach_schema_info(schema_info)
+
+        self.logger.debug('Schema cache hit for %s: %s', server.name, schema_info_path)
+        return True
+
+    def save(self, server):
+        """ Saves the DSA info and schema of :paramref:`server` to the cache, removing any out of date schema files.
+
+        :param ldap3.Server server: Server whose DSA info and schema were just read from the directory.
+        :return: :const:`None`.
+
+        """
+        dsa_info, schema_info = server.info, server.schema
+
+        if dsa_info is None or schema_info is None:
+            return
+
+        modify_time_stamp = SchemaCache._get_raw_value(schema_info.raw, 'modifyTimestamp')
+
+        if modify_time_stamp is None:
+            self.logger.debug('Schema for %s has no modifyTimestamp and cannot be cached', server.name)
+            return
+
+        server_key = self._get_server_key(server)
+        schema_info_name = server_key + '.' + self._get_schema_key(
+            SchemaCache._get_first_value(schema_info.schema_entry), modify_time_stamp) + '.schema.json'
+
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            self._write(schema_info_name, schema_info.to_json(indent=None, sort=False))
+            self._write(server_key + '.dsa.json', dsa_info.to_json(indent=None, sort=False))
+            for path in glob(os.path.join(self.directory, server_key + '.*.schema.json')):
+                if os.path.basename(path) != schema_info_name:
+                    os.remove(path)
+        except (IOError, OSError, ValueError, ldap3.core.exceptions.LDAPException) as error:
+            self.logger.warning('Failed to save the schema for %s to %s: %s', server.name, self.directory, error)
+            return
+
+        self.logger.debug('Saved schema for %s to %s', server.name, schema_info_name)
+        return
+
+    # region Privates
+
+    @staticmethod
+    def _get_first_value(value):
+        if isinstance(value, (list, tuple)):
+            return value[0] if value else None
+        return value
+
+    @staticmethod
+    def _get_raw_value(raw_attributes, name):
+        # Raw attribute dictionaries read from the server are case insensitive; those saved by ldap3 are not
+        name = name.lower()
+        for key, value in iteritems(raw_attributes):
+            if key.lower() == name:
+                value = SchemaCache._get_first_value(value)
+                return value.decode('utf-8') if isinstance(value, binary_type) else value
+        return None
+
+    @staticmethod
+    def _hash(*values):
+        return sha1('\0'.join(text_type(value) for value in values).encode('utf-8')).hexdigest()
+
+    def _get_schema_key(self, schema_entry, modify_time_stamp):
+        return SchemaCache._hash(SchemaCache.version, schema_entry, modify_time_stamp)
+
+    def _get_server_key(self, server):
+        return SchemaCache._hash(SchemaCache.version, self.domain, server.host, server.port)
+
+    def _read_modify_time_stamp(self, connection, schema_entry):
+        try:
+            result = connection.search(
+                schema_entry, '(objectClass=subschema)', ldap3.BASE, attributes=['modifyTimestamp'],
+                get_operational_attributes=True)
+            response = connection.response if connection.strategy.sync else connection.get_response(result)[0]
+        except ldap3.core.exceptions.LDAPOperationResult as error:
+            self.logger.debug('Failed to revalidate cached schema entry %s: %s', schema_entry, error)
+            return None
+        if not response:
+            return None
+        return SchemaCache._get_raw_value(response[0].get('raw_attributes', {}), 'modifyTimestamp')
+
+    def _write(self, name, text):
+        # Write to a temporary file and then rename it so that concurrent commands never read a partial file
+        with NamedTemporaryFile('wb', dir=self.directory, prefix='.' + name, delete=False) as target:
+            target.write(text.encode('utf-8'))
+        replace = getattr(os, 'replace', os.rename)
+        replace(target.name, os.path.join(self.directory, name))
+
+    # endregion
+
+
+class CachingServer(ldap3.Server):
+    """ An :class:`ldap3.Server` that reads its DSA info and schema through a :class:`SchemaCache`.
+
+    The outcome of each availability check is recorded in its :class:`app.ServerHealth`, if it has one.
+
+    """
+    def __init__(self, *args, **kwargs):
+        # These must be set before ldap3.Server.__init__ is called
+        self.schema_cache = kwargs.pop('schema_cache', None)
+        self.server_health = kwargs.pop('server_health', None)
+        super(CachingServer, self).__init__(*args, **kwargs)
+
+    def check_availability(self, *args, **kwargs):
+        start_time = time()
+        available = super(CachingServer, self).check_availability(*args, **kwargs)
+        if self.server_health is not None:
+            self.server_health.record(self, time() - start_time if available else None)
+        return available
+
+    def get_info_from_server(self, connection):
+        schema_cache = self.schema_cache
+        if (schema_cache is None or self.get_info != ldap3.ALL or connection is None or connection.closed or
+                connection.strategy.no_real_dsa or connection.strategy.pooled):
+            return super(CachingServer, self).get_info_from_server(connection)
+        if schema_cache.load(self, connection):
+            return
+        super(CachingServer, self).get_info_from_server(connection)
+        schema_cache.save(self)
@@ -0,0 +1,102 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from collections import deque
+
+import ldap3
+
+
+class SearchPipeline(object):
+    """ Pipelines LDAP search requests on asynchronous connections.
+
+    A synchronous connection waits a full round trip for the response to one search before it sends the next. On high
+    latency links to remote domain controllers this--not the directory server--bounds the rate at which a streaming
+    command processes records. A search pipeline keeps up to `depth` search requests in flight on each connection and
+    returns their responses in the order the requests were made, so that commands can still write records in the order
+    they were received.
+
+    Connections must be opened with the :const:`ldap3.ASYNC` client strategy. When `paged_size` is greater than zero
+    each search is sent with the simple paged results control; the first page is pipelined and any remaining pages are
+    read as soon as the first page is returned.
+
+    Responses are awaited for as long as a synchronous connection would wait for them, not the ldap3
+    `RESPONSE_WAITING_TIMEOUT` of three seconds.
+
+    """
+    timeout = float('inf')
+
+    def __init__(self, depth, paged_size=0):
+        self.depth = depth
+        self.paged_size = paged_size
+
+    def search(self, requests):
+        """ Sends search requests and yields their responses in request order.
+
+        :param requests: An iterable of `(item, connection, arguments)` tuples. The `arguments` are a dictionary of
+            keyword arguments to :meth:`ldap3.Connection.search` or :const:`None`, if no search is required for `item`.
+        :return: An iterable stream of `(item, response)` tuples in the order of :paramref:`requests`. The `response`
+            is the list of search result entries and references returned for `item`, an empty list if its search base
+            does not exist, or :const:`None` if no search was required for `item`.
+
+        """
+        outstanding = {}
+        pending = deque()
+
+        for item, connection, arguments in requests:
+
+            if arguments is None:
+                pending.append((item, None, None, None))
+            else:
+                if self.paged_size > 0:
+                    arguments = dict(arguments, paged_size=self.paged_size)
+                key = id(connection)
+                while outstanding.get(key, 0) >= self.depth:
+                    yield self._get_response(pending.popleft(), outstanding)
+                pending.append((item, connection, connection.search(**arguments), arguments))
+                outstanding[key] = outstanding.get(key, 0) + 1
+
+            while pending and pending[0][1] is None:
+                yield self._get_response(pending.popleft(), outstanding)
+
+        while pending:
+            yield self._get_response(pending.popleft(), outstanding)
+
+        return
+
+    # region Privates
+
+    @staticmethod
+    def _get_cookie(result):
+        try:
+            return result['controls']['1.2.840.113556.1.4.319']['value']['cookie']
+        except (KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _get_response(request, outstanding):
+
+        item, connection, message_id, arguments = request
+
+        if connection is None:
+            return item, None
+
+        outstanding[id(connection)] -= 1
+
+        try:
+            response, result = connection.get_response(message_id, timeout=SearchPipeline.timeout)
+        except ldap3.core.exceptions.LDAPNoSuchObjectResult:
+            return item, []
+
+        cookie = SearchPipeline._get_cookie(result)
+
+        while cookie:
+            more_response, result = connection.get_response(
+                connection.search(paged_cookie=cookie, **arguments), timeout=SearchPipeline.timeout)
+            response.extend(more_response)
+            cookie = SearchPipeline._get_cookie(result)
+
+        return item, response
+
+    # endregion
@@ -0,0 +1,187 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from datetime import datetime, MINYEAR
+from hashlib import sha1
+from tempfile import NamedTemporaryFile
+from threading import Lock
+from time import time
+import io
+import json
+import os
+
+from ldap3 import FIRST, ServerPool
+from ldap3.core.exceptions import LDAPServerPoolExhaustedError
+from ldap3.core.pooling import ServerPoolState
+
+from .six import text_type
+
+
+class ServerHealth(object):
+    """ Tracks the availability and connect latency of the directory servers for a domain between command invocations.
+
+    When the `server` setting of a domain lists more than one host, its servers are pooled by a
+    :class:`HealthOrderedServerPool` and each is checked for availability before it is used. This class records the
+    outcome of each check--the time it took to connect or the time it failed--and saves it to disk. Servers that failed
+    within the last `retry_interval` seconds are tried after all others. Hence a domain controller that is down costs a
+    connect timeout once per `retry_interval`, not on every search, unless all other servers are down as well.
+
+    Health is stored in a file named by a digest of the domain.
+
+    """
+    version = 2
+    retry_interval = 300  # seconds
+
+    def __init__(self, directory, domain, logger):
+        self.directory = directory
+        self.domain = domain
+        self.logger = logger
+        self._path = os.path.join(directory, ServerHealth._hash(ServerHealth.version, domain) + '.health.json')
+        self._state = None
+        self._lock = Lock()
+
+    def order(self, servers, rotate=False):
+        """ Orders servers by their recorded health.
+
+        :param servers: A list of :class:`ldap3.Server` objects in configuration order.
+        :param rotate: :const:`False`, if servers that have not recently failed should be ordered by connect latency;
+            otherwise, :const:`True`, if they should be ordered by configuration order starting one past the server
+            that came first the last time they were rotated. Rotations are counted in the saved health so that
+            consecutive searches start at different servers.
+        :return: A new list of the :paramref:`servers` ordered from first to last to try. Servers that failed within
+            the last `retry_interval` seconds come last, in configuration order.
+
+        """
+        with self._lock:
+            state = self._load()
+            if rotate:
+                rotation = state['rotation'] = state.get('rotation', -1) + 1
+                self._save(state)
+
+        health_by_server = state['servers']
+        failure_time = time() - ServerHealth.retry_interval
+        available, failed = [], []
+
+        for server in servers:
+            health = health_by_server.get(ServerHealth._get_key(server), {})
+            failure = health.get('failure')
+            if failure is not None and failure > failure_time:
+                failed.append(server)
+            else:
+                available.append((health.get('latency'), server))
+
+        if rotate:
+            index = rotation % len(available) if available else 0
+            available = available[index:] + available[:index]
+        else:
+            available.sort(key=lambda item: (item[0] is None, item[0] or 0.0))  # stable: ties keep configuration order
+
+        return [server for latency, server in available] + failed
+
+    def record(self, server, latency):
+        """ Records the outcome of a check for the availability of a server.
+
+        :param ldap3.Server server: Server that was checked.
+        :param latency: Seconds it took to connect to :paramref:`server` or :const:`None`, if it is unavailable.
+        :return: :const:`None`.
+
+        """
+        with self._lock:
+            state = self._load()
+            health = state['servers'].setdefault(ServerHealth._get_key(server), {})
+            if latency is None:
+                health['failure'] = time()
+                self.logger.debug('Server %s is unavailable', server.name)
+            else:
+                health['failure'] = None
+                health['latency'] = latency
+            self._save(state)
+        return
+
+    # region Privates
+
+    @staticmethod
+    def _get_key(server):
+        return '{0}:{1}'.format(server.host, server.port)
+
+    @staticmethod
+    def _hash(*values):
+        return sha1('\0'.join(text_type(value) for value in values).encode('utf-8')).hexdigest()
+
+    def _load(self):
+        if self._state is None:
+            try:
+                with io.open(self._path, 'r', encoding='utf-8') as source:
+                    state = json.load(source)
+                if not (isinstance(state, dict) and isinstance(state.get('servers'), dict)):
+                    raise ValueError('Expected a JSON object with a servers object')
+            except (IOError, OSError, ValueError) as error:
+                self.logger.debug('No server health for %s at %s: %s', self.domain, self._path, error)
+                state = {'servers': {}}
+            self._state = state
+        return self._state
+
+    def _save(self, state):
+        try:
+            if not os.path.isdir(self.directory):
+                os.makedirs(self.directory)
+            # Write to a temporary file and then rename it so that concurrent commands never read a partial file
+            prefix = '.' + os.path.basename(self._path)
+            with NamedTemporaryFile('wb', dir=self.directory, prefix=prefix, delete=False) as target:
+                target.write(json.dumps(state, separators=(',', ':')).encode('utf-8'))
+            replace = getattr(os, 'replace', os.rename)
+            replace(target.name, self._path)
+        except (IOError, OSError) as error:
+            self.logger.warning('Failed to save server health for %s to %s: %s', self.domain, self._path, error)
+        return
+
+    # endregion
+
+
+class HealthOrderedServerPool(ServerPool):
+    """ An :class:`ldap3.ServerPool` that orders its servers by their recorded health for each connection it serves.
+
+    ldap3 pools start each connection at a random server, unless their strategy is FIRST, and keep track of unavailable
+    servers for one connection only. Instead, this pool orders its servers with :meth:`ServerHealth.order` each time
+    a connection is opened and returns the first available server in that order. Each server is checked once; a
+    connection fails without waiting for ldap3's POOLING_LOOP_TIMEOUT when all servers are unavailable.
+
+    :param servers: A list of :class:`app.CachingServer` objects that record their availability in
+        :paramref:`server_health`, in configuration order.
+    :param server_health: The health of :paramref:`servers`.
+    :param rotate: :const:`True`, if consecutive connections should start with consecutive servers; otherwise,
+        :const:`False`, if each connection should start with the server with the lowest connect latency.
+
+    """
+    def __init__(self, servers, server_health, rotate):
+        super(HealthOrderedServerPool, self).__init__(
+            servers, FIRST, active=1, exhaust=ServerHealth.retry_interval)
+        self.server_health = server_health
+        self.rotate = rotate
+
+    def initialize(self, connection):
+        self.pool_states[connection] = _HealthOrderedServerPoolState(self)
+
+
+class _HealthOrderedServerPoolState(ServerPoolState):
+
+    def refresh(self):
+        server_pool = self.server_pool
+        servers = server_pool.server_health.order(server_pool.servers, server_pool.rotate)
+        self.servers = [[server, datetime(MINYEAR, 1, 1), True] for server in servers]
+        self.last_used_server = 0
+
+    def find_active_server(self, starting):
+        # Servers found unavailable by this connection are skipped for exhaust seconds when it reconnects
+        now = datetime.now()
+        for index, server_state in enumerate(self.servers):
+            server, last_checked_time, available = server_state
+            if not available and (now - last_checked_time).seconds < self.server_pool.exhaust:
+                continue
+            server_state[1] = now
+            server_state[2] = server.check_availability()
+            if server_state[2]:
+                return index
+        raise LDAPServerPoolExhaustedError('no active server available in server pool')
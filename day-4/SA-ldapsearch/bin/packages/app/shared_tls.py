@@ -0,0 +1,92 @@
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+from __future__ import absolute_import, division, print_function, unicode_literals
+from threading import Lock
+import ssl
+
+from ldap3 import Tls
+from ldap3.core.tls import check_hostname, use_ssl_context
+
+
+class SharedContextTls(Tls):
+    """ An :class:`ldap3.Tls` that shares one :class:`ssl.SSLContext` among all connections with the same TLS settings.
+
+    :meth:`ldap3.Tls.wrap_socket` creates an SSL context and loads the certificates of the certification authorities
+    into it for every connection it secures. This class creates the context for a set of TLS settings the first time a
+    connection is secured with them and reuses it for every subsequent connection to any server in any domain. Hence a
+    CA bundle is read once per process, not once per connection.
+
+    Contexts are not shared when :mod:`ssl` does not support them, as is the case prior to Python 2.7.9.
+
+    """
+    _contexts = {}
+    _contexts_lock = Lock()
+
+    def wrap_socket(self, connection, do_handshake=False):
+
+        if not use_ssl_context:
+            return super(SharedContextTls, self).wrap_socket(connection, do_handshake)
+
+        ssl_context = self._get_ssl_context()
+
+        if self.sni:
+            wrapped_socket = ssl_context.wrap_socket(
+                connection.socket, server_side=False, do_handshake_on_connect=do_handshake, server_hostname=self.sni)
+        else:
+            wrapped_socket = ssl_context.wrap_socket(
+                connection.socket, server_side=False, do_handshake_on_connect=do_handshake)
+
+        if do_handshake and (self.validate == ssl.CERT_REQUIRED or self.validate == ssl.CERT_OPTIONAL):
+            check_hostname(wrapped_socket, connection.server.host, self.valid_names)
+
+        connection.socket = wrapped_socket
+        return
+
+    # region Privates
+
+    def _get_ssl_context(self):
+
+        key = (
+            self.version, self.validate, self.ca_certs_file, self.ca_certs_path, self.ca_certs_data,
+            self.certificate_file, self.private_key_file, self.private_key_password, self.ciphers)
+
+        with SharedContextTls._contexts_lock:
+            ssl_context = SharedContextTls._contexts.get(key)
+            if ssl_context is None:
+                ssl_context = SharedContextTls._contexts[key] = self._create_ssl_context()
+
+        return ssl_context
+
+    def _create_ssl_context(self):
+
+        # Mirrors ldap3.Tls.wrap_socket
+
+        if self.version is None:
+            ssl_context = ssl.create_default_context(
+                purpose=ssl.Purpose.SERVER_AUTH, cafile=self.ca_certs_file, capath=self.ca_certs_path,
+                cadata=self.ca_certs_data)
+        else:
+            ssl_context = ssl.SSLContext(self.version)
+            if self.ca_certs_file or self.ca_certs_path or self.ca_certs_data:
+                ssl_context.load_verify_locations(self.ca_certs_file, self.ca_certs_path, self.ca_certs_data)
+            elif self.validate != ssl.CERT_NONE:
+                ssl_context.load_default_certs(ssl.Purpose.SERVER_AUTH)
+
+        if self.certificate_file:
+            ssl_context.load_cert_chain(
+                self.certificate_file, keyfile=self.private_key_file, password=self.private_key_password)
+
+        ssl_context.check_hostname = False
+        ssl_context.verify_mode = self.validate
+
+        if self.ciphers:
+            try:
+                ssl_context.set_ciphers(self.ciphers)
+            except ssl.SSLError:
+                pass
+
+        return ssl_context
+
+    # endregion
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+""" Compares the decoders of LDAP searchResEntry messages.
+
+Usage:
+
+    python ber_decoder.py
+
+Three decoders are timed on the same messages:
+
+* pyasn1, which ldap3 uses when a connection is opened with `fast_decoder=False`;
+* ldap3's generic fast decoder, `decode_sequence`, which decodes every other LDAP response; and
+* `decode_message_fast`, which hands searchResEntry messages to `decode_search_result_entry_message_fast`.
+
+Before timing, the entries decoded by the generic fast decoder and `decode_message_fast` are checked to be equal.
+
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+from timeit import repeat
+import os
+import random
+import struct
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from ldap3.protocol.rfc4511 import LDAPMessage
+from ldap3.utils.asn1 import LDAP_MESSAGE_CONTEXT, compute_ber_size, decode_message_fast, decode_sequence, decoder
+
+
+def encode(tag, value):
+    length = len(value)
+    if length < 0x80:
+        header = struct.pack(b'BB', tag, length)
+    elif length < 0x100:
+        header = struct.pack(b'BBB', tag, 0x81, length)
+    elif length < 0x10000:
+        header = struct.pack(b'>BBH', tag, 0x82, length)
+    else:
+        header = struct.pack(b'>BBI', tag, 0x84, length)
+    return header + value
+
+
+def encode_entry(message_id, dn, attributes):
+    attribute_list = b''.join(
+        encode(0x30, encode(0x04, name) + encode(0x31, b''.join(encode(0x04, value) for value in values)))
+        for name, values in attributes)
+    entry = encode(0x64, encode(0x04, dn) + encode(0x30, attribute_list))
+    return encode(0x30, encode(0x02, struct.pack(b'>I', message_id)) + entry)
+
+
+def create_messages():
+    random.seed(1)
+
+    def random_bytes(count):
+        return b''.join(struct.pack(b'B', random.randrange(0x100)) for _ in range(count))
+
+    user = [
+        (b'objectClass', [b'top', b'person', b'organizationalPerson', b'user']),
+        (b'cn', [b'Jane Doe']),
+        (b'sAMAccountName', [b'jdoe']),
+        (b'displayName', [b'Jane Doe']),
+        (b'distinguishedName', [b'CN=Jane Doe,OU=Users,DC=splunk,DC=com']),
+        (b'memberOf', [('CN=Group {0},OU=Groups,DC=splunk,DC=com'.format(i)).encode('ascii') for i in range(20)]),
+        (b'objectSid', [random_bytes(28)]),
+        (b'objectGUID', [random_bytes(16)]),
+        (b'userAccountControl', [b'512']),
+        (b'whenCreated', [b'20200101120000.0Z']),
+        (b'mail', [b'jdoe@splunk.com'])]
+
+    group = [
+        (b'cn', [b'Everyone']),
+        (b'member', [('CN=User {0},OU=Users,DC=splunk,DC=com'.format(i)).encode('ascii') for i in range(1000)])]
+
+    return [
+        ('user, 11 attributes', encode_entry(7, b'CN=Jane Doe,OU=Users,DC=splunk,DC=com', user), 2000),
+        ('user, 3 attributes', encode_entry(7, b'CN=Jane Doe,OU=Users,DC=splunk,DC=com', user[1:4]), 2000),
+        ('group, 1000 members', encode_entry(7, b'CN=Everyone,DC=splunk,DC=com', group), 200)]
+
+
+def decode_message_generic(message):
+    # The body of decode_message_fast for messages other than searchResEntry
+    length, offset = compute_ber_size(message[:10])
+    decoded = decode_sequence(message, offset, offset + length, LDAP_MESSAGE_CONTEXT)
+    return {'messageID': decoded[0][3], 'protocolOp': decoded[1][2], 'payload': decoded[1][3]}
+
+
+def check(message):
+    expected = decode_message_generic(message)
+    actual = decode_message_fast(message)
+    payload = expected['payload']
+    entry = payload[0][3], [
+        (attribute[3][0][3], [value[3] for value in attribute[3][1][3]]) for attribute in payload[1][3]]
+    assert actual['messageID'] == expected['messageID'] and actual['protocolOp'] == expected['protocolOp']
+    assert actual['payload'] == entry
+
+
+def main():
+    print('{0:<20} {1:>10} {2:>10} {3:>10}   microseconds per message'.format(
+        '', 'pyasn1', 'generic', 'entry'))
+    for name, message, number in create_messages():
+        check(message)
+        times = [min(repeat(lambda: decode(message), number=count, repeat=3)) / count * 1e6 for decode, count in (
+            (lambda m: decoder.decode(m, asn1Spec=LDAPMessage()), max(number // 20, 10)),
+            (decode_message_generic, number),
+            (decode_message_fast, number))]
+        print('{0:<20} {1:>10.1f} {2:>10.1f} {3:>10.1f}   ({4:.1f}x generic)'.format(
+            name, times[0], times[1], times[2], times[1] / times[2]))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python
+# coding=utf-8
+#
+# Copyright (C) 2009-2021 Splunk Inc. All Rights Reserved.
+
+""" Compares the search command record writers with those of an earlier revision of splunklib.
+
+Usage:
+
+    python record_writer.py <revision> [<record-count>]
+
+The baseline is the `splunklib/searchcommands/internals.py` of `<revision>`, a git revision of this repository; for
+example the parent of the commit that introduced encoder tables to :class:`RecordWriter`. Each writer writes the same
+records--AD-like records with 120 fields, a quarter of them multivalues of 2 to 30 distinguished names--one at a time
+with `write_record` and in batches with `write_records`. The best of three runs is reported and the output of each pair
+of writers is checked to be byte-for-byte identical.
+
+"""
+from __future__ import absolute_import, division, print_function, unicode_literals
+from collections import OrderedDict
+from io import BytesIO
+from timeit import default_timer
+import os
+import random
+import subprocess
+import sys
+import types
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from splunklib.searchcommands import internals
+
+
+def load_baseline(revision):
+    directory = os.path.dirname(os.path.abspath(internals.__file__))
+    source = subprocess.check_output(['git', 'show', revision + ':./internals.py'], cwd=directory)
+    module = types.ModuleType('splunklib.searchcommands.baseline_internals')
+    module.__package__ = 'splunklib.searchcommands'
+    module.__file__ = internals.__file__
+    exec(compile(source, internals.__file__, 'exec'), module.__dict__)
+    return module
+
+
+def create_records(count):
+    random.seed(1)
+    records = []
+    for i in range(count):
+        record = OrderedDict()
+        for j in range(120):
+            name = 'attr{0}'.format(j)
+            kind = j % 4
+            if kind == 0:
+                record[name] = [
+                    'CN=Member{0},OU=People,DC=example,DC=com'.format(k) for k in range(random.randint(2, 30))]
+            elif kind == 1:
+                record[name] = 'value {0}'.format(i)
+            elif kind == 2:
+                record[name] = [i, 2.5, True, None] if j == 2 else [i]
+            else:
+                record[name] = None if j % 8 == 3 else True
+        record['_raw'] = '{{"x": {0}}}'.format(i)
+        records.append(record)
+    return records
+
+
+def run(module, class_name, records, batch):
+    output = BytesIO()
+    writer = getattr(module, class_name)(output, 500)
+    start_time = default_timer()
+    if batch:
+        writer.write_records(records)
+    else:
+        for record in records:
+            writer.write_record(record)
+    writer.flush(finished=True)
+    return default_timer() - start_time, output.getvalue()
+
+
+def main(argv):
+    if len(argv) not in (2, 3):
+        print(__doc__, file=sys.stderr)
+        return 2
+
+    baseline = load_baseline(argv[1])
+    records = create_records(int(argv[2]) if len(argv) == 3 else 2000)
+
+    for class_name in 'RecordWriterV1', 'RecordWriterV2':
+        for batch in False, True:
+            baseline_time, baseline_output = min(run(baseline, class_name, records, batch) for _ in range(3))
+            current_time, current_output = min(run(internals, class_name, records, batch) for _ in range(3))
+            print('{0} {1:<13} baseline {2:.3f}s current {3:.3f}s ({4:.1f}x) identical={5}'.format(
+                class_name, 'write_records' if batch else 'write_record', baseline_time, current_time,
+                baseline_time / current_time, baseline_output == current_output))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
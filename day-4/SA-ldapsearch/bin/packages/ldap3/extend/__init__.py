@@ -44,7 +44,7 @@ from .novell.removeMembersFromGroups import edir_remove_members_from_groups
 from .novell.checkGroupsMemberships import edir_check_groups_memberships
 from .standard.whoAmI import WhoAmI
 from .standard.modifyPassword import ModifyPassword
-from .standard.PagedSearch import paged_search_generator, paged_search_accumulator
+from .standard.PagedSearch import paged_search_generator, paged_search_accumulator, paged_search_streamer
 from .standard.PersistentSearch import PersistentSearch
 
 
@@ -93,9 +93,24 @@ class StandardExtendedOperations(ExtendedOperationContainer):
                      controls=None,
                      paged_size=100,
                      paged_criticality=False,
-                     generator=True):
-
-        if generator:
+                     generator=True,
+                     prefetch=False):
+
+        if generator and prefetch:
+            return paged_search_streamer(self._connection,
+                                         search_base,
+                                         search_filter,
+                                         search_scope,
+                                         dereference_aliases,
+                                         attributes,
+                                         size_limit,
+                                         time_limit,
+                                         types_only,
+                                         get_operational_attributes,
+                                         controls,
+                                         paged_size,
+                                         paged_criticality)
+        elif generator:
             return paged_search_generator(self._connection,
                                           search_base,
                                           search_filter,
@@ -75,7 +75,8 @@ class DirSync(object):
                                                   show_deleted_control(criticality=False)]
                                         )
         if not self.connection.strategy.sync:
-            response, result = self.connection.get_response(result)
+            # the first DirSync response of a large directory may take longer than RESPONSE_WAITING_TIMEOUT to compute
+            response, result = self.connection.get_response(result, timeout=float('inf'))
         else:
             response = self.connection.response
             result = self.connection.result
@@ -23,6 +23,8 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
+from collections import deque
+
 from ... import SUBTREE, DEREF_ALWAYS
 from ...utils.dn import safe_dn
 from ...core.results import DO_NOT_RAISE_EXCEPTIONS, RESULT_SIZE_LIMIT_EXCEEDED
@@ -46,7 +48,7 @@ def paged_search_generator(connection,
     if connection.check_names and search_base:
         search_base = safe_dn(search_base)
 
-    responses = []
+    responses = deque()
     cookie = True  # performs search at least one time
     while cookie:
         result = connection.search(search_base,
@@ -80,11 +82,92 @@ def paged_search_generator(connection,
                 log(PROTOCOL, 'paged search operation result <%s> for <%s>', result, connection)
             if result['result'] == RESULT_SIZE_LIMIT_EXCEEDED:
                 while responses:
-                    yield responses.pop()
+                    yield responses.popleft()
             raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'])
 
         while responses:
-            yield responses.pop()
+            yield responses.popleft()  # in server order
+
+    connection.response = None
+
+
+def paged_search_streamer(connection,
+                          search_base,
+                          search_filter,
+                          search_scope=SUBTREE,
+                          dereference_aliases=DEREF_ALWAYS,
+                          attributes=None,
+                          size_limit=0,
+                          time_limit=0,
+                          types_only=False,
+                          get_operational_attributes=False,
+                          controls=None,
+                          paged_size=100,
+                          paged_criticality=False):
+    """
+    Yields the entries of a paged search in server order, one page at a time
+    With an asynchronous strategy the request for the next page is sent as soon as the current page is complete, so that
+    the next page is received and decoded by the receiver thread while the current page is consumed. Each entry is
+    released as it is yielded: no more than two pages are held in memory
+    With a synchronous strategy this is equivalent to paged_search_generator
+    """
+    if connection.strategy.sync:
+        for response in paged_search_generator(connection,
+                                               search_base,
+                                               search_filter,
+                                               search_scope,
+                                               dereference_aliases,
+                                               attributes,
+                                               size_limit,
+                                               time_limit,
+                                               types_only,
+                                               get_operational_attributes,
+                                               controls,
+                                               paged_size,
+                                               paged_criticality):
+            yield response
+        return
+
+    if connection.check_names and search_base:
+        search_base = safe_dn(search_base)
+
+    def send(cookie):
+        return connection.search(search_base,
+                                 search_filter,
+                                 search_scope,
+                                 dereference_aliases,
+                                 attributes,
+                                 size_limit,
+                                 time_limit,
+                                 types_only,
+                                 get_operational_attributes,
+                                 controls,
+                                 paged_size,
+                                 paged_criticality,
+                                 cookie)
+
+    message_id = send(None)
+    while message_id is not None:
+        # a page may take longer than RESPONSE_WAITING_TIMEOUT to compute: wait as long as a synchronous strategy would
+        response, result = connection.get_response(message_id, timeout=float('inf'))
+        try:
+            cookie = result['controls']['1.2.840.113556.1.4.319']['value']['cookie']
+        except KeyError:
+            cookie = None
+
+        message_id = send(cookie) if cookie and result['result'] in DO_NOT_RAISE_EXCEPTIONS else None  # prefetch the next page
+
+        response.reverse()
+        if result and result['result'] not in DO_NOT_RAISE_EXCEPTIONS:
+            if log_enabled(PROTOCOL):
+                log(PROTOCOL, 'paged search operation result <%s> for <%s>', result, connection)
+            if result['result'] == RESULT_SIZE_LIMIT_EXCEEDED:
+                while response:
+                    yield response.pop()
+            raise LDAPOperationResult(result=result['result'], description=result['description'], dn=result['dn'], message=result['message'], response_type=result['type'])
+
+        while response:
+            yield response.pop()
 
     connection.response = None
 
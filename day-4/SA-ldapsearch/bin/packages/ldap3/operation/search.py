@@ -36,7 +36,7 @@ from ..protocol.rfc4511 import SearchRequest, LDAPDN, Scope, DerefAliases, Integ
     Substrings, Final, Initial, Any, ResultCode, Substring, MatchingRule, Type, MatchValue, DnAttributes
 from ..operation.bind import referrals_to_list
 from ..protocol.convert import ava_to_dict, attributes_to_list, search_refs_to_list, validate_assertion_value, prepare_filter_for_sending, search_refs_to_list_fast
-from ..protocol.formatters.standard import format_attribute_values
+from ..protocol.formatters.standard import get_formatter_table
 from ..utils.conv import to_unicode, to_raw
 
 
@@ -383,10 +383,11 @@ def decode_vals(vals):
 
 
 def decode_vals_fast(vals):
+    # vals is a list of bytes, as in the (type, values) attributes of decode_search_result_entry_fast
     try:
-        return [to_unicode(val[3], from_server=True) for val in vals if val] if vals else None
+        return [to_unicode(val, from_server=True) for val in vals] if vals else None
     except UnicodeDecodeError:
-        return [val[3] for val in vals if val] if vals else None
+        return vals[:] if vals else None
 
 
 def attributes_to_dict(attribute_list):
@@ -401,8 +402,8 @@ def attributes_to_dict(attribute_list):
 def attributes_to_dict_fast(attribute_list):
     conf_case_insensitive_attributes = get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES')
     attributes = CaseInsensitiveDict() if conf_case_insensitive_attributes else dict()
-    for attribute in attribute_list:
-        attributes[to_unicode(attribute[3][0][3], from_server=True)] = decode_vals_fast(attribute[3][1][3])
+    for attribute_type, values in attribute_list:
+        attributes[to_unicode(attribute_type, from_server=True)] = decode_vals_fast(values)
 
     return attributes
 
@@ -411,10 +412,6 @@ def decode_raw_vals(vals):
     return [bytes(val) for val in vals] if vals else None
 
 
-def decode_raw_vals_fast(vals):
-    return [bytes(val[3]) for val in vals] if vals else None
-
-
 def raw_attributes_to_dict(attribute_list):
     conf_case_insensitive_attributes = get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES')
 
@@ -425,32 +422,15 @@ def raw_attributes_to_dict(attribute_list):
     return attributes
 
 
-def raw_attributes_to_dict_fast(attribute_list):
-    conf_case_insensitive_attributes = get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES')
-    attributes = CaseInsensitiveDict() if conf_case_insensitive_attributes else dict()
-    for attribute in attribute_list:
-        attributes[to_unicode(attribute[3][0][3], from_server=True)] = decode_raw_vals_fast(attribute[3][1][3])
-
-    return attributes
-
-
 def checked_attributes_to_dict(attribute_list, schema=None, custom_formatter=None):
     conf_case_insensitive_attributes = get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES')
 
     checked_attributes = CaseInsensitiveDict() if conf_case_insensitive_attributes else dict()
+    formatters = get_formatter_table(schema, custom_formatter)
     for attribute in attribute_list:
         name = str(attribute['type'])
-        checked_attributes[name] = format_attribute_values(schema, name, decode_raw_vals(attribute['vals']) or [], custom_formatter)
-    return checked_attributes
-
-
-def checked_attributes_to_dict_fast(attribute_list, schema=None, custom_formatter=None):
-    conf_case_insensitive_attributes = get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES')
-
-    checked_attributes = CaseInsensitiveDict() if conf_case_insensitive_attributes else dict()
-    for attribute in attribute_list:
-        name = to_unicode(attribute[3][0][3], from_server=True)
-        checked_attributes[name] = format_attribute_values(schema, name, decode_raw_vals_fast(attribute[3][1][3]) or [], custom_formatter)
+        values = decode_raw_vals(attribute['vals'])
+        checked_attributes[name] = formatters[name](values) if values else []
     return checked_attributes
 
 
@@ -560,14 +540,25 @@ def search_result_reference_response_to_dict(response):
 
 
 def search_result_entry_response_to_dict_fast(response, schema, custom_formatter, check_names):
+    # response is the (dn, [(type, values), ...]) payload of decode_search_result_entry_message_fast
+    raw_dn, attribute_list = response
+    conf_case_insensitive_attributes = get_config_parameter('CASE_INSENSITIVE_ATTRIBUTE_NAMES')
+    raw_attributes = CaseInsensitiveDict() if conf_case_insensitive_attributes else dict()
+    attributes = CaseInsensitiveDict() if conf_case_insensitive_attributes else dict()
+    formatters = get_formatter_table(schema, custom_formatter) if check_names else None
+    for attribute_type, values in attribute_list:
+        name = to_unicode(attribute_type, from_server=True)
+        raw_attributes[name] = values or None  # formatters never return the list of raw values they are given
+        if check_names:
+            attributes[name] = formatters[name](values) if values else []
+        else:
+            attributes[name] = decode_vals_fast(values)
+
     entry_dict = dict()
-    entry_dict['raw_dn'] = response[0][3]
-    entry_dict['dn'] = to_unicode(response[0][3], from_server=True)
-    entry_dict['raw_attributes'] = raw_attributes_to_dict_fast(response[1][3])  # attributes
-    if check_names:
-        entry_dict['attributes'] = checked_attributes_to_dict_fast(response[1][3], schema, custom_formatter)  # attributes
-    else:
-        entry_dict['attributes'] = attributes_to_dict_fast(response[1][3])  # attributes
+    entry_dict['raw_dn'] = raw_dn
+    entry_dict['dn'] = to_unicode(raw_dn, from_server=True)
+    entry_dict['raw_attributes'] = raw_attributes
+    entry_dict['attributes'] = attributes
 
     return entry_dict
 
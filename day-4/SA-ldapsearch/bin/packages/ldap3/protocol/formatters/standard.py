@@ -23,6 +23,8 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
+from weakref import WeakKeyDictionary
+
 from ... import SEQUENCE_TYPES
 from .formatters import format_ad_timestamp, format_binary, format_boolean,\
     format_integer, format_sid, format_time, format_unicode, format_uuid, format_uuid_le, format_time_with_0_year
@@ -187,13 +189,42 @@ def find_attribute_helpers(attr_type, name, custom_formatter):
     return formatter
 
 
-def format_attribute_values(schema, name, values, custom_formatter):
-    if not values:  # RFCs states that attributes must always have values, but a flaky server returns empty values too
-        return []
+class FormatterTable(dict):
+    """
+    Maps attribute names to functions that format the list of raw values of the attribute
+    Formatters are resolved with find_attribute_helpers on first use of each name and reused for all later entries, with
+    the single or multi value handling of the attribute type compiled in
+    """
+    def __init__(self, schema, custom_formatter):
+        dict.__init__(self)
+        self.schema = schema
+        self.custom_formatter = custom_formatter
 
-    if not isinstance(values, SEQUENCE_TYPES):
-        values = [values]
+    def __missing__(self, name):
+        formatter = self[name] = compile_attribute_formatter(self.schema, name, self.custom_formatter)
+        return formatter
+
+
+_formatter_tables = WeakKeyDictionary()  # schema -> {id(custom_formatter): FormatterTable}
 
+
+def get_formatter_table(schema, custom_formatter):
+    """
+    Returns the FormatterTable of schema and custom_formatter, which is shared by all entries formatted with them
+    Tables are dropped with their schema, so a schema refreshed from the server is compiled anew
+    """
+    if schema is None:
+        return FormatterTable(None, custom_formatter)
+    tables = _formatter_tables.get(schema)
+    if tables is None:
+        tables = _formatter_tables[schema] = dict()
+    table = tables.get(id(custom_formatter))
+    if table is None or table.custom_formatter is not custom_formatter:
+        table = tables[id(custom_formatter)] = FormatterTable(schema, custom_formatter)
+    return table
+
+
+def compile_attribute_formatter(schema, name, custom_formatter):
     if schema and schema.attribute_types and name in schema.attribute_types:
         attr_type = schema.attribute_types[name]
     else:
@@ -205,12 +236,25 @@ def format_attribute_values(schema, name, values, custom_formatter):
     else:
         formatter = format_unicode if not attribute_helpers[0] else attribute_helpers[0]
 
-    formatted_values = [formatter(raw_value) for raw_value in values]  # executes formatter
-    if formatted_values:
-        return formatted_values[0] if (attr_type and attr_type.single_value) else formatted_values
-    else:  # RFCs states that attributes must always have values, but AD return empty values in DirSync
+    if attr_type and attr_type.single_value:
+        def format_values(values):
+            return formatter(values[0]) if values else []  # AD returns empty values in DirSync
+    else:
+        def format_values(values):
+            return [formatter(raw_value) for raw_value in values]
+
+    return format_values
+
+
+def format_attribute_values(schema, name, values, custom_formatter):
+    if not values:  # RFCs states that attributes must always have values, but a flaky server returns empty values too
         return []
 
+    if not isinstance(values, SEQUENCE_TYPES):
+        values = [values]
+
+    return get_formatter_table(schema, custom_formatter)[name](values)
+
 
 def find_attribute_validator(schema, name, custom_validator):
     if schema and schema.attribute_types and name in schema.attribute_types:
@@ -23,7 +23,8 @@
 # along with ldap3 in the COPYING and COPYING.LESSER files.
 # If not, see <http://www.gnu.org/licenses/>.
 
-from threading import Thread, Lock
+from threading import Thread, Lock, Condition
+from time import sleep, time
 import socket
 
 from .. import get_config_parameter
@@ -61,7 +62,18 @@ class AsyncStrategy(BaseStrategy):
             """
             Wait for data on socket, compute the length of the message and wait for enough bytes to decode the message
             Message are appended to strategy._responses
+            The strategy is closed however the thread exits, so that get_response stops waiting for responses that will never arrive
             """
+            try:
+                self._receive()
+            finally:
+                try:
+                    self.connection.strategy.close()
+                finally:
+                    with self.connection.strategy.async_lock:
+                        self.connection.strategy.response_complete.notify_all()
+
+        def _receive(self):
             unprocessed = b''
             get_more_data = True
             listen = True
@@ -124,6 +136,7 @@ class AsyncStrategy(BaseStrategy):
                                 self.connection.strategy._responses[message_id] = [dict_response]
                             if dict_response['type'] not in ['searchResEntry', 'searchResRef', 'intermediateResponse']:
                                 self.connection.strategy._responses[message_id].append(RESPONSE_COMPLETE)
+                                self.connection.strategy.response_complete.notify_all()
                         if self.connection.strategy.can_stream:  # for AsyncStreamStrategy, used for PersistentSearch
                             self.connection.strategy.accumulate_stream(message_id, dict_response)
                         unprocessed = unprocessed[length:]
@@ -137,7 +150,6 @@ class AsyncStrategy(BaseStrategy):
                             if log_enabled(ERROR):
                                 log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
                             raise LDAPStartTLSError(self.connection.last_error)
-            self.connection.strategy.close()
 
     def __init__(self, ldap_connection):
         BaseStrategy.__init__(self, ldap_connection)
@@ -149,6 +161,7 @@ class AsyncStrategy(BaseStrategy):
         self.can_stream = False
         self.receiver = None
         self.async_lock = Lock()
+        self.response_complete = Condition(self.async_lock)
 
     def open(self, reset_usage=True, read_server_info=True):
         """
@@ -211,6 +224,25 @@ class AsyncStrategy(BaseStrategy):
 
         return responses
 
+    def _wait_for_response(self, message_id, interval):
+        """
+        Waits at most interval seconds for the receiver thread to complete the response to message_id
+        Pipelined requests are served as soon as they complete rather than on the next RESPONSE_SLEEPTIME tick
+        """
+        if not self.connection.listening:
+            sleep(interval)
+            return
+        deadline = time() + interval
+        with self.async_lock:
+            while self.connection.listening:
+                responses = self._responses.get(message_id)
+                if responses and responses[-1] == RESPONSE_COMPLETE:
+                    break
+                remaining = deadline - time()
+                if remaining <= 0:
+                    break
+                self.response_complete.wait(remaining)
+
     def receiving(self):
         raise NotImplementedError
 
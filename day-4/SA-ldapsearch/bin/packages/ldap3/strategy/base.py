@@ -57,7 +57,7 @@ from ..protocol.oid import Oids
 from ..protocol.rfc2696 import RealSearchControlValue
 from ..protocol.microsoft import DirSyncControlResponseValue
 from ..utils.log import log, log_enabled, ERROR, BASIC, PROTOCOL, NETWORK, EXTENDED, format_ldap_message
-from ..utils.asn1 import encode, decoder, ldap_result_to_dict_fast, decode_sequence
+from ..utils.asn1 import encode, decoder, ldap_result_to_dict_fast, decode_sequence, decode_search_result_entry_fast
 from ..utils.conv import to_unicode
 
 SESSION_TERMINATED_BY_SERVER = 'TERMINATED_BY_SERVER'
@@ -329,8 +329,10 @@ class BaseStrategy(object):
         if self._outstanding and message_id in self._outstanding:
             while timeout >= 0:  # waiting for completed message to appear in responses
                 responses = self._get_response(message_id)
-                if not responses:
-                    sleep(conf_sleep_interval)
+                if not responses and not self.sync and self.connection.closed:  # receiver thread stopped listening and closed the socket
+                    responses = SESSION_TERMINATED_BY_SERVER
+                elif not responses:
+                    self._wait_for_response(message_id, conf_sleep_interval)
                     timeout -= conf_sleep_interval
                     continue
 
@@ -606,9 +608,9 @@ class BaseStrategy(object):
             control_value['more_results'] = True if control_resp[0][3][0][3] else False  # more_result if nonzero
             control_value['cookie'] = control_resp[0][3][2][3]
         elif control_type == '1.3.6.1.1.13.1' or control_type == '1.3.6.1.1.13.2':  # Pre-Read control, Post-Read Control as per RFC 4527
-            control_resp = decode_sequence(control_value, 0, len(control_value))
+            dn, attribute_list = decode_search_result_entry_fast(control_value)
             control_value = dict()
-            control_value['result'] = attributes_to_dict_fast(control_resp[0][3][1][3])
+            control_value['result'] = attributes_to_dict_fast(attribute_list)
         return control_type, {'description': Oids.get(control_type, ''), 'criticality': criticality, 'value': control_value}
 
     @staticmethod
@@ -852,6 +854,10 @@ class BaseStrategy(object):
         # overridden in strategy class
         raise NotImplementedError
 
+    def _wait_for_response(self, message_id, interval):
+        # may be overridden in strategy class to wake up as soon as the response is complete
+        sleep(interval)
+
     def receiving(self):
         # overridden in strategy class
         raise NotImplementedError
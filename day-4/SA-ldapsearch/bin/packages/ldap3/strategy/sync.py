@@ -69,17 +69,23 @@ class SyncStrategy(BaseStrategy):
         """
         Receive data over the socket
         Checks if the socket is closed
+        Data is received into a growable buffer with recv_into and each message is copied out of it exactly once, so
+        receiving a page of large entries is linear in the size of the page
         """
         messages = []
         receiving = True
-        unprocessed = b''
-        data = b''
+        buffer = bytearray(self.socket_size)
+        view = memoryview(buffer)
+        start = end = 0  # unprocessed data is buffer[start:end]
+        length = -1
         get_more_data = True
         exc = None
         while receiving:
             if get_more_data:
+                if end == len(buffer) or (length > 0 and start + length > len(buffer)):
+                    buffer, view, start, end = SyncStrategy._make_room(buffer, view, start, end, max(length, end - start + self.socket_size))
                 try:
-                    data = self.connection.socket.recv(self.socket_size)
+                    received = self.connection.socket.recv_into(view[end:])
                 except (OSError, socket.error, AttributeError) as e:
                     self.connection.last_error = 'error receiving data: ' + str(e)
                     exc = e
@@ -93,29 +99,41 @@ class SyncStrategy(BaseStrategy):
                         log(ERROR, '<%s> for <%s>', self.connection.last_error, self.connection)
                     raise communication_exception_factory(LDAPSocketReceiveError, exc)(self.connection.last_error)
 
-                unprocessed += data
-            if len(data) > 0:
-                length = BaseStrategy.compute_ldap_message_size(unprocessed)
-                if length == -1:  # too few data to decode message length
-                    get_more_data = True
+                if received == 0:
+                    receiving = False
                     continue
-                if len(unprocessed) < length:
-                    get_more_data = True
-                else:
-                    if log_enabled(NETWORK):
-                        log(NETWORK, 'received %d bytes via <%s>', len(unprocessed[:length]), self.connection)
-                    messages.append(unprocessed[:length])
-                    unprocessed = unprocessed[length:]
-                    get_more_data = False
-                    if len(unprocessed) == 0:
-                        receiving = False
+                end += received
+            length = BaseStrategy.compute_ldap_message_size(buffer[start:min(end, start + 16)])  # at most 16 bytes of BER header
+            if length == -1 or end - start < length:  # too few data to decode message length or the whole message
+                get_more_data = True
             else:
-                receiving = False
+                if log_enabled(NETWORK):
+                    log(NETWORK, 'received %d bytes via <%s>', length, self.connection)
+                messages.append(view[start:start + length].tobytes())
+                start += length
+                length = -1
+                get_more_data = False
+                if start == end:
+                    receiving = False
 
         if log_enabled(NETWORK):
             log(NETWORK, 'received %d ldap messages via <%s>', len(messages), self.connection)
         return messages
 
+    @staticmethod
+    def _make_room(buffer, view, start, end, size):
+        """
+        Moves unprocessed data to the start of the buffer so that it can hold at least size bytes from start
+        The buffer is replaced with one twice as large, or large enough to hold size bytes, when it is too small
+        """
+        unprocessed = end - start
+        if size <= len(buffer):
+            buffer[:unprocessed] = view[start:end].tobytes()  # same size assignment: the exported view remains valid
+            return buffer, view, 0, unprocessed
+        new_buffer = bytearray(max(size, 2 * len(buffer)))
+        new_buffer[:unprocessed] = view[start:end].tobytes()
+        return new_buffer, memoryview(new_buffer), 0, unprocessed
+
     def post_send_single_response(self, message_id):
         """
         Executed after an Operation Request (except Search)
@@ -101,6 +101,8 @@ def compute_ber_size(data):
 
 def decode_message_fast(message):
     ber_len, ber_value_offset = compute_ber_size(get_bytes(message[:10]))  # get start of sequence, at maximum 3 bytes for length
+    if get_byte(message[ber_value_offset + get_byte(message[ber_value_offset + 1]) + 2]) == SEARCH_RESULT_ENTRY_TAG:  # protocolOp follows the messageID, whose length is always in short form
+        return decode_search_result_entry_message_fast(message)
     decoded = decode_sequence(message, ber_value_offset, ber_len + ber_value_offset, LDAP_MESSAGE_CONTEXT)
     return {
         'messageID': decoded[0][3],
@@ -110,6 +112,89 @@ def decode_message_fast(message):
     }
 
 
+def decode_search_result_entry_message_fast(message):
+    """
+    Decode an LDAPMessage carrying a searchResEntry, the bulk of search traffic
+    The payload is a (dn, attributes) tuple, where attributes is a list of (type, values) tuples and dn, type and each
+    value are bytes sliced from the message. The entry is walked with offset arithmetic over the octets of the message
+    without building a tuple for each BER element
+    """
+    octets = get_octets(message)
+    position = read_ber_length(octets, 1)[1]  # LDAPMessage
+    length, position = read_ber_length(octets, position + 1)  # messageID
+    message_id = decode_integer(message, position, position + length)
+    dn, attributes, position = decode_search_result_entry(message, octets, position + length)
+
+    controls = None
+    if position < len(octets) and octets[position] == CONTROLS_TAG:
+        length, position = read_ber_length(octets, position + 1)
+        controls = decode_controls(message, position, position + length)
+
+    return {
+        'messageID': message_id,
+        'protocolOp': 4,
+        'payload': (dn, attributes),
+        'controls': controls
+    }
+
+
+def decode_search_result_entry_fast(message):
+    """
+    Decode a searchResEntry on its own, as found in the value of a Pre-Read or Post-Read control
+    Returns a (dn, attributes) tuple like the payload of decode_search_result_entry_message_fast
+    """
+    dn, attributes, _ = decode_search_result_entry(message, get_octets(message), 0)
+    return dn, attributes
+
+
+def decode_search_result_entry(message, octets, start):
+    """
+    Decode the searchResEntry that starts at octets[start]
+    Returns the dn, the list of (type, values) tuples of its attributes and the offset following the entry
+    """
+    length, position = read_ber_length(octets, start + 1)  # searchResEntry
+    entry_stop = position + length
+    length, position = read_ber_length(octets, position + 1)  # objectName
+    dn = message[position: position + length]
+    position = read_ber_length(octets, position + length + 1)[1]  # attributes
+    attributes = []
+    while position < entry_stop:
+        position = read_ber_length(octets, position + 1)[1]  # PartialAttribute
+        length, position = read_ber_length(octets, position + 1)  # type
+        attribute_type = message[position: position + length]
+        length, position = read_ber_length(octets, position + length + 1)  # vals
+        values_stop = position + length
+        values = []
+        while position < values_stop:
+            length = octets[position + 1]
+            if length < 128:  # short form, which is the common case of attribute values
+                position += 2
+            else:
+                length, position = read_ber_length(octets, position + 1)
+            values.append(message[position: position + length])
+            position += length
+        attributes.append((attribute_type, values))
+
+    return dn, attributes, entry_stop
+
+
+def read_ber_length(octets, position):
+    """
+    Read the BER definite length at octets[position]
+    Returns the length and the offset of the value
+    """
+    length = octets[position]
+    position += 1
+    if length < 128:
+        return length, position
+    stop = position + length - 128
+    length = 0
+    while position < stop:
+        length = length << 8 | octets[position]
+        position += 1
+    return length, position
+
+
 def decode_sequence(message, start, stop, context_decoders=None):
     decoded = []
     while start < stop:
@@ -191,6 +276,9 @@ if str is not bytes:  # Python 3
 
     def get_bytes(x):
         return x
+
+    def get_octets(x):
+        return memoryview(x)  # indexing a memoryview of bytes returns ints and never copies
 else:  # Python 2
     def get_byte(x):
         return ord(x)
@@ -198,6 +286,12 @@ else:  # Python 2
     def get_bytes(x):
         return bytearray(x)
 
+    def get_octets(x):
+        return bytearray(x)
+
+SEARCH_RESULT_ENTRY_TAG = 0x64  # [APPLICATION 4] constructed
+CONTROLS_TAG = 0xA0  # [0] constructed
+
 DECODERS = {
     # Universal
     (0, 1): decode_boolean,  # Boolean
@@ -36,21 +36,18 @@ def to_unicode(obj, encoding=None, from_server=False):
     """Try to convert bytes (and str in python2) to unicode.
      Return object unmodified if python3 string, else raise an exception
     """
-    conf_default_client_encoding = get_config_parameter('DEFAULT_CLIENT_ENCODING')
-    conf_default_server_encoding = get_config_parameter('DEFAULT_SERVER_ENCODING')
-    conf_additional_server_encodings = get_config_parameter('ADDITIONAL_SERVER_ENCODINGS')
-    conf_additional_client_encodings = get_config_parameter('ADDITIONAL_CLIENT_ENCODINGS')
+    # configuration parameters are read only when needed: this function is called for each attribute of each entry
     if isinstance(obj, NUMERIC_TYPES):
         obj = str(obj)
 
     if isinstance(obj, (bytes, bytearray)):
         if from_server:  # data from server
             if encoding is None:
-                encoding = conf_default_server_encoding
+                encoding = get_config_parameter('DEFAULT_SERVER_ENCODING')
             try:
                 return obj.decode(encoding)
             except UnicodeDecodeError:
-                for encoding in conf_additional_server_encodings:  # AD could have DN not encoded in utf-8 (even if this is not allowed by RFC4510)
+                for encoding in get_config_parameter('ADDITIONAL_SERVER_ENCODINGS'):  # AD could have DN not encoded in utf-8 (even if this is not allowed by RFC4510)
                     try:
                         return obj.decode(encoding)
                     except UnicodeDecodeError:
@@ -58,11 +55,11 @@ def to_unicode(obj, encoding=None, from_server=False):
                 raise UnicodeError("Unable to convert server data to unicode: %r" % obj)
         else:  # data from client
             if encoding is None:
-                encoding = conf_default_client_encoding
+                encoding = get_config_parameter('DEFAULT_CLIENT_ENCODING')
             try:
                 return obj.decode(encoding)
             except UnicodeDecodeError:
-                for encoding in conf_additional_client_encodings:  # tries additional encodings
+                for encoding in get_config_parameter('ADDITIONAL_CLIENT_ENCODINGS'):  # tries additional encodings
                     try:
                         return obj.decode(encoding)
                     except UnicodeDecodeError:
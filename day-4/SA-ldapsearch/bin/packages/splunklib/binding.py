@@ -26,17 +26,21 @@ If you want a friendlier interface to the Splunk REST API, use the
 
 from __future__ import absolute_import
 
+import errno
 import io
 import logging
+import select
 import socket
 import ssl
 import sys
 import time
 from base64 import b64encode
+from collections import deque
 from contextlib import contextmanager
 from datetime import datetime
 from functools import wraps
 from io import BytesIO
+from threading import Lock
 from xml.etree.ElementTree import XML
 
 from splunklib import six
@@ -460,6 +464,15 @@ class Context(object):
     :type retries: ``int``
     :param retryDelay: How long to wait between connection attempts if `retries` > 0 (optional, defaults to 10s).
     :type retryDelay: ``int`` (in seconds)
+    :param keepalive: Set to True to keep connections to splunkd open and reuse them for subsequent requests (optional,
+        the default is False). Ignored when `handler` is specified.
+    :type keepalive: ``Boolean``
+    :param pool_size: The maximum number of idle connections kept open per scheme, host, and port when `keepalive` is
+        True (optional, the default is 4).
+    :type pool_size: ``int``
+    :param pool_idle_timeout: How long an idle connection is kept open when `keepalive` is True (optional, the default
+        is 30s).
+    :type pool_idle_timeout: ``int`` (in seconds)
     :param handler: The HTTP request handler (optional).
     :returns: A ``Context`` instance.
 
@@ -478,7 +491,9 @@ class Context(object):
     def __init__(self, handler=None, **kwargs):
         self.http = HttpLib(handler, kwargs.get("verify", False), key_file=kwargs.get("key_file"),
                             cert_file=kwargs.get("cert_file"),  context=kwargs.get("context"), # Default to False for backward compat
-                            retries=kwargs.get("retries", 0), retryDelay=kwargs.get("retryDelay", 10))
+                            retries=kwargs.get("retries", 0), retryDelay=kwargs.get("retryDelay", 10),
+                            keepalive=kwargs.get("keepalive", False), pool_size=kwargs.get("pool_size", 4),
+                            pool_idle_timeout=kwargs.get("pool_idle_timeout", 30))
         self.token = kwargs.get("token", _NoAuthenticationToken)
         if self.token is None: # In case someone explicitly passes token=None
             self.token = _NoAuthenticationToken
@@ -1029,6 +1044,9 @@ def connect(**kwargs):
     :param autologin: When ``True``, automatically tries to log in again if the
         session terminates.
     :type autologin: ``Boolean``
+    :param keepalive: When ``True``, keeps connections to splunkd open and reuses
+        them for subsequent requests.
+    :type keepalive: ``Boolean``
     :return: An initialized :class:`Context` instance.
 
     **Example**::
@@ -1164,11 +1182,14 @@ class HttpLib(object):
     no further processing. By default, ``HttpLib`` calls the :func:`handler` function
     to get a handler function.
 
-    If using the default handler, SSL verification can be disabled by passing verify=False.
+    If using the default handler, SSL verification can be disabled by passing verify=False and connections can be kept
+    open for reuse by passing keepalive=True.
     """
-    def __init__(self, custom_handler=None, verify=False, key_file=None, cert_file=None, context=None, retries=0, retryDelay=10):
+    def __init__(self, custom_handler=None, verify=False, key_file=None, cert_file=None, context=None, retries=0, retryDelay=10,
+                 keepalive=False, pool_size=4, pool_idle_timeout=30):
         if custom_handler is None:
-            self.handler = handler(verify=verify, key_file=key_file, cert_file=cert_file, context=context)
+            self.handler = handler(verify=verify, key_file=key_file, cert_file=cert_file, context=context,
+                                   keepalive=keepalive, pool_size=pool_size, idle_timeout=pool_idle_timeout)
         else:
             self.handler = custom_handler
         self._cookies = {}
@@ -1326,9 +1347,10 @@ class ResponseReader(io.RawIOBase):
     # For testing, you can use a StringIO as the argument to
     # ``ResponseReader`` instead of an ``httplib.HTTPResponse``. It
     # will work equally well.
-    def __init__(self, response, connection=None):
+    def __init__(self, response, connection=None, release=None):
         self._response = response
         self._connection = connection
+        self._release = release
         self._buffer = b''
 
     def __str__(self):
@@ -1357,10 +1379,21 @@ class ResponseReader(io.RawIOBase):
 
     def close(self):
         """Closes this response."""
+        if self._release is not None:
+            # The connection can be reused only if the response was read to its end
+            if self._response.isclosed():
+                self._release_connection()
+                return
+            self._release = None
         if self._connection:
             self._connection.close()
         self._response.close()
 
+    def _release_connection(self):
+        release, self._release = self._release, None
+        connection, self._connection = self._connection, None
+        release(connection)
+
     def read(self, size = None):
         """Reads a given number of characters from the response.
 
@@ -1374,6 +1407,8 @@ class ResponseReader(io.RawIOBase):
         if size is not None:
             size -= len(r)
         r = r + self._response.read(size)
+        if self._release is not None and self._response.isclosed():
+            self._release_connection()
         return r
 
     def readable(self):
@@ -1394,7 +1429,85 @@ class ResponseReader(io.RawIOBase):
         return bytes_read
 
 
-def handler(key_file=None, cert_file=None, timeout=None, verify=False, context=None):
+class _HttpConnectionPool(object):
+    """Keeps idle HTTP connections open for reuse by the default request handler.
+
+    Idle connections are kept per scheme, host, and port. At most `size` of them are kept for each and those left idle
+    for longer than `idle_timeout` seconds are closed instead of being reused.
+    """
+    def __init__(self, connect, size, idle_timeout):
+        self._connect = connect
+        self._size = size
+        self._idle_timeout = idle_timeout
+        self._idle = {}
+        self._lock = Lock()
+
+    def acquire(self, scheme, host, port):
+        """Returns a 2-tuple: an idle or new connection and whether it is being reused."""
+        key = scheme, host, port
+        expired = []
+        connection = None
+
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle:
+                deadline = time.time() - self._idle_timeout
+                while idle:
+                    connection, released_at = idle.pop()  # most recently released
+                    if released_at >= deadline and not _HttpConnectionPool._is_dropped(connection):
+                        break
+                    expired.append(connection)
+                    connection = None
+
+        for item in expired:
+            item.close()
+
+        if connection is not None:
+            return connection, True
+
+        return self._connect(scheme, host, port), False
+
+    def release(self, scheme, host, port, connection):
+        """Returns a connection whose response was read to its end to the pool."""
+        key = scheme, host, port
+
+        with self._lock:
+            idle = self._idle.get(key)
+            if idle is None:
+                idle = self._idle[key] = deque()
+            if len(idle) < self._size:
+                idle.append((connection, time.time()))
+                return
+
+        connection.close()
+
+    @staticmethod
+    def _is_dropped(connection):
+        # An idle connection is readable only when the server closed it
+        sock = connection.sock
+        if sock is None:
+            return True
+        try:
+            return bool(select.select([sock], [], [], 0)[0])
+        except (ValueError, select.error):
+            return True
+
+
+_idempotent_methods = frozenset(("DELETE", "GET", "HEAD", "OPTIONS", "PUT", "TRACE"))
+
+
+def _is_stale_connection_error(error):
+    """Returns True if `error` shows that the server closed a reused connection before it sent any response.
+
+    Timeouts are not stale connection errors: the server may still be processing the request.
+    """
+    if isinstance(error, six.moves.http_client.BadStatusLine):
+        return error.line in ("", "''")  # no status line was received; includes RemoteDisconnected on Python 3
+    return isinstance(error, socket.error) and error.errno in (errno.EPIPE, errno.ECONNRESET)
+
+
+def handler(key_file=None, cert_file=None, timeout=None, verify=False, context=None, keepalive=False, pool_size=4,
+            idle_timeout=30):
     """This class returns an instance of the default HTTP request handler using
     the values you provide.
 
@@ -1408,6 +1521,12 @@ def handler(key_file=None, cert_file=None, timeout=None, verify=False, context=N
     :type verify: ``Boolean``
     :param `context`: The SSLContext that can is used with the HTTPSConnection when verify=True is enabled and context is specified
     :type context: ``SSLContext`
+    :param `keepalive`: Set to True to keep connections open and reuse them for subsequent requests to the same scheme, host, and port.
+    :type keepalive: ``Boolean``
+    :param `pool_size`: The maximum number of idle connections kept open per scheme, host, and port when keepalive=True.
+    :type pool_size: ``integer``
+    :param `idle_timeout`: How long, in seconds, an idle connection is kept open when keepalive=True.
+    :type idle_timeout: ``integer``
     """
 
     def connect(scheme, host, port):
@@ -1428,6 +1547,36 @@ def handler(key_file=None, cert_file=None, timeout=None, verify=False, context=N
             return six.moves.http_client.HTTPSConnection(host, port, **kwargs)
         raise ValueError("unsupported scheme: %s" % scheme)
 
+    pool = _HttpConnectionPool(connect, pool_size, idle_timeout) if keepalive else None
+
+    def pooled_request(scheme, host, port, method, path, body, head):
+        while True:
+            connection, is_reused = pool.acquire(scheme, host, port)
+            try:
+                connection.request(method, path, body, head)
+                if timeout is not None:
+                    connection.sock.settimeout(timeout)
+                response = connection.getresponse()
+            except Exception as error:
+                connection.close()
+                if is_reused and method in _idempotent_methods and _is_stale_connection_error(error):
+                    continue  # the server closed the idle connection; retry on another one
+                raise
+            break
+
+        if response.will_close:
+            release = None
+        else:
+            def release(c):
+                pool.release(scheme, host, port, c)
+
+        return {
+            "status": response.status,
+            "reason": response.reason,
+            "headers": response.getheaders(),
+            "body": ResponseReader(response, connection, release),
+        }
+
     def request(url, message, **kwargs):
         scheme, host, port, path = _spliturl(url)
         body = message.get("body", "")
@@ -1436,12 +1585,15 @@ def handler(key_file=None, cert_file=None, timeout=None, verify=False, context=N
             "Host": host,
             "User-Agent": "splunk-sdk-python/1.7.0",
             "Accept": "*/*",
-            "Connection": "Close",
+            "Connection": "Keep-Alive" if pool is not None else "Close",
         } # defaults
         for key, value in message["headers"]:
             head[key] = value
         method = message.get("method", "GET")
 
+        if pool is not None:
+            return pooled_request(scheme, host, port, method, path, body, head)
+
         connection = connect(scheme, host, port)
         is_keepalive = False
         try:
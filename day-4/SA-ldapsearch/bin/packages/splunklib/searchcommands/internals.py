@@ -571,9 +571,19 @@ class RecordWriter(object):
     def write_records(self, records):
         self._ensure_validity()
         records = list(records)
-        write_record = self._write_record
+        encode_record = self._encode_record
+        rows = []
         for record in records:
-            write_record(record)
+            if self._fieldnames is None:
+                rows.append(self._encode_fieldnames(record))
+            rows.append(encode_record(record))
+            self._pending_record_count += 1
+            if self._pending_record_count >= self._maxresultrows:
+                self._writerows(rows)
+                del rows[:]
+                self.flush(partial=True)
+        if rows:
+            self._writerows(rows)
 
     def _clear(self):
         self._buffer.seek(0)
@@ -588,97 +598,131 @@ class RecordWriter(object):
 
     def _write_record(self, record):
 
-        fieldnames = self._fieldnames
+        if self._fieldnames is None:
+            self._writerows([self._encode_fieldnames(record), self._encode_record(record)])
+        else:
+            self._writerows([self._encode_record(record)])
 
-        if fieldnames is None:
-            self._fieldnames = fieldnames = list(record.keys())
-            self._fieldnames.extend([i for i in self.custom_fields if i not in self._fieldnames])
-            value_list = imap(lambda fn: (str(fn), str('__mv_') + str(fn)), fieldnames)
-            self._writerow(list(chain.from_iterable(value_list)))
+        self._pending_record_count += 1
+
+        if self.pending_record_count >= self._maxresultrows:
+            self.flush(partial=True)
+
+    def _encode_fieldnames(self, record):
+        self._fieldnames = fieldnames = list(record.keys())
+        self._fieldnames.extend([i for i in self.custom_fields if i not in self._fieldnames])
+        value_list = imap(lambda fn: (str(fn), str('__mv_') + str(fn)), fieldnames)
+        return list(chain.from_iterable(value_list))
+
+    def _encode_record(self, record):
+
+        # Records written by a command usually have the same fields with values of the same types. Hence the encoder
+        # for each type of value is looked up once in a table rather than selected by a chain of type tests for every
+        # value. Multivalues are joined rather than built by repeated concatenation.
 
         get_value = record.get
+        encoders = RecordWriter._value_encoders
+        get_encoder = RecordWriter._get_encoder
+        encode_values = RecordWriter._encode_values
         values = []
+        append = values.append
 
-        for fieldname in fieldnames:
+        for fieldname in self._fieldnames:
             value = get_value(fieldname, None)
 
             if value is None:
-                values += (None, None)
+                append(None)
+                append(None)
                 continue
 
             value_t = type(value)
 
-            if issubclass(value_t, (list, tuple)):
+            if value_t is list or value_t is tuple or issubclass(value_t, (list, tuple)):
 
                 if len(value) == 0:
-                    values += (None, None)
+                    append(None)
+                    append(None)
                     continue
 
                 if len(value) > 1:
-                    value_list = value
-                    sv = ''
-                    mv = '$'
-
-                    for value in value_list:
+                    value_list = encode_values(value)
+                    append('\n'.join(value_list))
+                    append('$' + '$;$'.join([item.replace('$', '$$') for item in value_list]) + '$')
+                    continue
 
-                        if value is None:
-                            sv += '\n'
-                            mv += '$;$'
-                            continue
+                value = value[0]
+                value_t = type(value)
 
-                        value_t = type(value)
+            encoder = encoders.get(value_t)
 
-                        if value_t is not bytes:
+            if encoder is None:
+                encoder = get_encoder(encoders, value_t, repr)
 
-                            if value_t is bool:
-                                value = str(value.real)
-                            elif value_t is six.text_type:
-                                value = value
-                            elif isinstance(value, six.integer_types) or value_t is float or value_t is complex:
-                                value = str(value)
-                            elif issubclass(value_t, (dict, list, tuple)):
-                                value = str(''.join(RecordWriter._iterencode_json(value, 0)))
-                            else:
-                                value = repr(value).encode('utf-8', errors='backslashreplace')
+            append(encoder(value))
+            append(None)
 
-                        sv += value + '\n'
-                        mv += value.replace('$', '$$') + '$;$'
+        return values
 
-                    values += (sv[:-1], mv[:-2])
-                    continue
+    @staticmethod
+    def _encode_values(value_list):
+        encoders = RecordWriter._multivalue_encoders
+        get_encoder = RecordWriter._get_encoder
+        values = []
+        append = values.append
+        value_t = encoder = None
 
-                value = value[0]
+        for value in value_list:
+            if type(value) is not value_t:
                 value_t = type(value)
+                encoder = encoders.get(value_t)
+                if encoder is None:
+                    encoder = get_encoder(encoders, value_t, repr)
+            append(encoder(value))
 
-            if value_t is bool:
-                values += (str(value.real), None)
-                continue
-
-            if value_t is bytes:
-                values += (value, None)
-                continue
+        return values
 
-            if value_t is six.text_type:
-                if six.PY2:
-                    value = value.encode('utf-8')
-                values += (value, None)
-                continue
+    @staticmethod
+    def _get_encoder(encoders, value_t, default):
+        # Values of a subclass are encoded like values of their nearest base class with an encoder
+        for base_t in getattr(value_t, '__mro__', ())[1:]:
+            encoder = encoders.get(base_t)
+            if encoder is not None:
+                break
+        else:
+            encoder = default
+        encoders[value_t] = encoder
+        return encoder
 
-            if isinstance(value, six.integer_types) or value_t is float or value_t is complex:
-                values += (str(value), None)
-                continue
+    if six.PY2:
 
-            if issubclass(value_t, dict):
-                values += (str(''.join(RecordWriter._iterencode_json(value, 0))), None)
-                continue
+        def _writerows(self, rows):
+            self._writer.writerows(rows)
 
-            values += (repr(value), None)
+    else:
 
-        self._writerow(values)
-        self._pending_record_count += 1
+        def _writerows(self, rows):
+            # Equivalent to self._writer.writerows(rows) for rows of text and None values, but a field is scanned for the
+            # characters that require quoting with a handful of substring tests rather than character by character
+            encode_row = RecordWriter._encode_csv_row
+            self._buffer.write(''.join([encode_row(row) for row in rows]))
 
-        if self.pending_record_count >= self._maxresultrows:
-            self.flush(partial=True)
+        @staticmethod
+        def _encode_csv_row(row):
+            fields = []
+            append = fields.append
+            for value in row:
+                if value is None:
+                    append('')
+                    continue
+                if type(value) is not str:
+                    value = str(value)
+                if '"' in value:
+                    append('"' + value.replace('"', '""') + '"')
+                elif ',' in value or '\n' in value or '\r' in value:
+                    append('"' + value + '"')
+                else:
+                    append(value)
+            return ','.join(fields) + CsvDialect.lineterminator
 
     try:
         # noinspection PyUnresolvedReferences
@@ -707,6 +751,39 @@ class RecordWriter(object):
 
         del make_encoder
 
+    @staticmethod
+    def _encode_json(value):
+        return str(''.join(RecordWriter._iterencode_json(value, 0)))
+
+    @staticmethod
+    def _encode_bool(value):
+        return str(value.real)
+
+    _value_encoders = {
+        bool: _encode_bool.__func__,
+        bytes: lambda value: value,
+        six.text_type: (lambda value: value.encode('utf-8')) if six.PY2 else (lambda value: value),
+        float: str,
+        complex: str,
+        dict: lambda value: RecordWriter._encode_json(value)
+    }
+
+    _value_encoders.update((t, str) for t in six.integer_types)
+
+    _multivalue_encoders = {
+        type(None): lambda value: '',
+        bool: _encode_bool.__func__,
+        bytes: str,
+        six.text_type: lambda value: value,
+        float: str,
+        complex: str,
+        dict: lambda value: RecordWriter._encode_json(value),
+        list: lambda value: RecordWriter._encode_json(value),
+        tuple: lambda value: RecordWriter._encode_json(value)
+    }
+
+    _multivalue_encoders.update((t, str) for t in six.integer_types)
+
 
 class RecordWriterV1(RecordWriter):
 
@@ -351,6 +351,8 @@ class SearchCommand(object):
         The :code:`enableheader` setting is :code:`true` by default. Hence, you need not set it. The
         :code:`requires_srinfo` setting is false by default. Hence, you must set it.
 
+        The service keeps its connections to splunkd open and reuses them for subsequent requests.
+
         :return: :class:`splunklib.client.Service`, if :code:`enableheader` and :code:`requires_srinfo` are both
             :code:`true`. Otherwise, if either :code:`enableheader` or :code:`requires_srinfo` are :code:`false`, a value
             of :code:`None` is returned.
@@ -377,7 +379,8 @@ class SearchCommand(object):
         uri = urlsplit(splunkd_uri, allow_fragments=False)
 
         self._service = Service(
-            scheme=uri.scheme, host=uri.hostname, port=uri.port, app=searchinfo.app, token=searchinfo.session_key)
+            scheme=uri.scheme, host=uri.hostname, port=uri.port, app=searchinfo.app, token=searchinfo.session_key,
+            keepalive=True)
 
         return self._service
 
@@ -4,6 +4,8 @@
 #
 #
 import csv
+import functools
+import io
 import sys
 import log
 import logging
@@ -35,15 +37,45 @@ property_flags = {
 }
 
 
+# Property flags in bit order and the mask of all bits that can be decoded
+flag_table = sorted((int(flag), name) for flag, name in property_flags.items())
+decodable_bits = functools.reduce(lambda mask, flag: mask | flag[0], flag_table, 0)
+
+# Output modes: one row per property flag, or one row per 'userAccountControl' value
+# with all of its property flags in a single space separated value (split it with makemv)
+output_modes = ("rows", "multivalue")
+
+
+@functools.lru_cache(maxsize=1024)
+def decode_flags(attribute_value):
+    """
+    Decode a 'userAccountControl' value.
+
+    There are only a few dozen distinct 'userAccountControl' values in practice,
+    so decoded values are memoized.
+
+    :param attribute_value: The 'userAccountControl' value as a decimal string.
+    :return: Tuple of property flag names in bit order, or None if the value has a
+             bit that is not a property flag.
+    """
+    value = int(attribute_value)
+    if value & ~decodable_bits:
+        return None
+    return tuple(name for flag, name in flag_table if value & flag)
+
+
 def main():
 
     logger = log.Log().get_logger("user_account_control_property")
     logger.info("Lookup script started executing..")
 
     # prints usage of the lookup script if wrong number of arguments provided
-    if len(sys.argv) != 3:
+    if len(sys.argv) not in (3, 4) or (
+        len(sys.argv) == 4 and sys.argv[3] not in output_modes
+    ):
         logger.debug(
-            "Usage: python user_account_control_property.py [userAccountControl] [userAccountPropertyFlag]"
+            "Usage: python user_account_control_property.py [userAccountControl] "
+            "[userAccountPropertyFlag] [rows|multivalue]"
         )
         logger.debug("Lookup script stopped..")
         sys.exit(1)
@@ -51,62 +83,72 @@ def main():
     # Lookup Field names
     userAccountControl = sys.argv[1]
     userAccountPropertyFlag = sys.argv[2]
+    multivalue = len(sys.argv) == 4 and sys.argv[3] == "multivalue"
 
+    # Rows are written to a large buffer that is flushed once all rows are written
     infile = sys.stdin
-    outfile = sys.stdout
+    outfile = io.open(
+        sys.stdout.fileno(), "w", buffering=65536, newline="", closefd=False
+    )
+
+    r = csv.reader(infile)
+    w = csv.writer(outfile)
+
+    try:
+        fieldnames = next(r)
+    except StopIteration:
+        return
 
-    r = csv.DictReader(infile)
+    if userAccountPropertyFlag not in fieldnames:
+        fieldnames.append(userAccountPropertyFlag)
 
-    w = csv.DictWriter(outfile, fieldnames=r.fieldnames)
+    w.writerow(fieldnames)
 
-    w.writeheader()
+    field_count = len(fieldnames)
+    flag_index = fieldnames.index(userAccountPropertyFlag)
+    value_index = (
+        fieldnames.index(userAccountControl)
+        if userAccountControl in fieldnames
+        else None
+    )
 
     # Decode flags for every 'userAccountControl' attribute value present in a search result
     for result in r:
         try:
-            if result[userAccountControl].isdigit():
-                attribute_value = int(result[userAccountControl])
-                bit_cnt = 0
-                incorrect_result_flag = False
-                flags = list()
-
-                # Prepare flag list by decoding 'userAccountcontrol' decimal value
-                # As 'userAccountControl' is decimal value, For each bit set to '1' a property flag can be denoted by using 'property_flags' map given above
-                while attribute_value != 0:
-                    if attribute_value & 1 == 1:
-                        flags.append(str(1 << bit_cnt))
-                    attribute_value = attribute_value >> 1
-                    bit_cnt += 1
-
-                # If flag not present in 'property_flags' map, The 'userAccountPropertyFlag' won't be populated in search result
-                for flag in flags:
-                    if flag not in list(property_flags.keys()):
-                        logger.debug(
-                            "'userAccountControl' attribute can not be decoded for value: {}".format(
-                                result[userAccountControl]
-                            )
-                        )
-                        incorrect_result_flag = True
-                        break
-                if incorrect_result_flag:
-                    continue
-                else:
-                    for flag in flags:
-                        result[userAccountPropertyFlag] = property_flags[flag]
-                        w.writerow(result)
-            else:
+            if len(result) < field_count:
+                result.extend([""] * (field_count - len(result)))
+
+            attribute_value = result[value_index]
+
+            # If a flag is not present in 'property_flags' map, The 'userAccountPropertyFlag'
+            # won't be populated in search result
+            flags = decode_flags(attribute_value) if attribute_value.isdigit() else None
+
+            if flags is None:
                 logger.debug(
                     "'userAccountControl' attribute can not be decoded for value: {}".format(
-                        result[userAccountControl]
+                        attribute_value
                     )
                 )
-        except:
+                continue
+
+            if multivalue:
+                if flags:
+                    result[flag_index] = " ".join(flags)
+                    w.writerow(result)
+            else:
+                for flag in flags:
+                    result[flag_index] = flag
+                    w.writerow(result)
+        except Exception:
             logger.debug(
                 "No results for 'userAccountControl' attribute value :{}".format(
-                    result[userAccountControl]
+                    result[value_index] if value_index is not None else None
                 )
             )
 
+    outfile.flush()
+
 
 if __name__ == "__main__":
     main()